@@ -3,10 +3,11 @@ from sqlalchemy.orm import Session, selectinload
 from database import get_db, frontend_url
 from core.models import Company, User, Campaign, ActivityLog, Influencer, Product
 from core.schemas import InfluencerOut, CompanyCreate, CompanyOut, CompanyListResponse, UserCreate, CampaignCreate, InfluencerCreate, CompanyBase
-from usecases.auth_use import get_current_user
+from usecases.principal import get_current_principal
 from typing import Optional
 from datetime import datetime
 from usecases.auth_use import hash_password, create_access_token
+from usecases.fast_json import json_bytes_response, shape_rows
 import logging
 import secrets, os, smtplib
 from usecases.utils import send_password_reset_email    
@@ -20,10 +21,8 @@ logger = logging.getLogger(__name__)
 def create_company(
     company_in: CompanyCreate,
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    user=Depends(get_current_principal)
 ):
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
-
     if not user or user.role != "admin":
         raise HTTPException(status_code=403, detail="Only admins can create companies")
 
@@ -56,10 +55,9 @@ def create_company(
 def add_influencer(
     payload: InfluencerCreate,
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    admin=Depends(get_current_principal)
 ):
     # 1) AuthZ
-    admin = db.query(User).filter(User.id == current_user["sub"]).first()
     if not admin or admin.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
 
@@ -129,9 +127,8 @@ def add_influencer(
 def add_campaign(
     campaign: CampaignCreate,
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    user=Depends(get_current_principal)
 ):
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
     if not user or user.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
 
@@ -155,7 +152,7 @@ def add_campaign(
     )
 
     db.add(new_campaign)
-    db.add(ActivityLog)
+    db.add(log)
     db.commit()
 
     return {"isSuccess": True, "message": "Campaign created successfully", "type": 0}
@@ -166,10 +163,10 @@ def list_companies(
     name: str = Query(default=None),
     email: str = Query(default=None),
     telefon: str = Query(default=None),
+    shape: str = Query("rows", pattern="^(rows|columns)$"),
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    user=Depends(get_current_principal)
 ):
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
     if not user or user.role != "admin":
         raise HTTPException(status_code=403, detail="You do not have permission to view companies")
 
@@ -184,22 +181,23 @@ def list_companies(
     if telefon:
         query = query.filter(Company.telefon.ilike(f"%{telefon}%"))
 
-    companies = query.order_by(Company.id).all()
+    columns = [getattr(Company, name) for name in CompanyOut.model_fields]
+    rows = query.with_entities(*columns).order_by(Company.id).all()
 
-    return {
-        "data": [CompanyOut.model_validate(c, from_attributes=True) for c in companies],
+    return json_bytes_response({
+        "data": shape_rows(list(CompanyOut.model_fields), rows, shape),
         "isSuccess": True,
         "message": None,
         "type": 0
-    }
+    })
 
 @router.get("/admin/list_influencers", tags=["Admin"])
 def list_influencers(
     name: str = Query(default=None),
+    shape: str = Query("rows", pattern="^(rows|columns)$"),
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    user=Depends(get_current_principal)
 ):
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
     if not user or user.role != "admin":
         raise HTTPException(status_code=403, detail="You do not have permission to view influencers")
 
@@ -208,33 +206,23 @@ def list_influencers(
     if name:
         query = query.filter(Influencer.username.ilike(f"%{name}%"))
 
-    influencers = query.order_by(Influencer.id).all()
+    columns = ["id", "username", "display_name", "email", "active"]
+    rows = query.with_entities(*[getattr(Influencer, c) for c in columns]).order_by(Influencer.id).all()
 
     # return simple serializable objects (no schema change)
-    data = [
-        {
-            "id": i.id,
-            "username": i.username,
-            "display_name": i.display_name,
-            "email": i.email,
-            "active": i.active,
-        }
-        for i in influencers
-    ]
-    return {
+    return json_bytes_response({
         "isSuccess": True,
         "message": None,
         "type": 0,
-        "data": data
-    }
+        "data": shape_rows(columns, rows, shape)
+    })
 
 @router.get("/admin/influencers/{influencer_id}", tags=["Admin"])
 def get_influencer_detail(
     influencer_id: int,
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    user = Depends(get_current_principal)
 ):
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
     if not user or user.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
 
@@ -265,9 +253,8 @@ def update_influencer(
     influencer_id: int,
     body: Dict[str, Any],
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    user = Depends(get_current_principal)
 ):
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
     if not user or user.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
 
@@ -313,10 +300,8 @@ def add_company_user(
     company_user: UserCreate,
     company_id: int,
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    user=Depends(get_current_principal)
 ):
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
-
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
 
@@ -339,9 +324,8 @@ def add_company_user(
 def get_company_detail(
     company_id: int,
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    user = Depends(get_current_principal)
 ):
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
     if not user or user.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
 
@@ -356,9 +340,8 @@ def update_company(
     company_id: int,
     body: CompanyBase,
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    user = Depends(get_current_principal)
 ):
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
     if not user or user.role != "admin":
         raise HTTPException(status_code=403, detail="Access denied")
 
@@ -402,10 +385,9 @@ def import_mlink_campaigns(
     body: Dict[str, Any],
     company_id: Optional[int] = Query(None),
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user),
+    user = Depends(get_current_principal),
 ):
     # auth & company scope
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
     if not user or user.role not in ["admin", "company"]:
         raise HTTPException(status_code=403, detail="Access denied")
 
@@ -496,9 +478,8 @@ def import_mlink_campaigns(
 def list_influencers(
     campaign_id: Optional[int] = Query(None),
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    user = Depends(get_current_principal)
 ):
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
     if not user or user.role not in ["admin", "company"]:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from core.models import User, Company, Influencer
 from core.schemas import (
@@ -12,7 +13,7 @@ from core.schemas import (
     ResetPasswordRequest,
 )
 from usecases.auth_use import (
-    verify_password,
+    verify_and_update_password,
     create_access_token,
     get_current_user,
     create_link_token,
@@ -23,15 +24,41 @@ from database import get_db
 from datetime import datetime, timedelta
 import os
 from usecases.utils import send_password_reset_email
+from usecases.click_stats import client_ip
+from usecases.rate_limit import enforce
 
 router = APIRouter(tags=["Auth"])
 
 @router.post("/login", response_model=TokenResponse)
-def login(request: TokenRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == request.username).first()
-    if not user or not verify_password(request.password, user.passwordHash):
+async def login(request: TokenRequest, http_request: Request, db: Session = Depends(get_db)):
+    # throttled before any DB lookup or bcrypt work
+    enforce(("login_ip", client_ip(http_request)), ("login_user", request.username.strip().lower()))
+
+    # DB work stays in the threadpool; bcrypt runs in the password pool
+    def lookup():
+        row = db.query(User.id, User.role, User.passwordHash).filter(User.username == request.username).first()
+        # hand the connection back before the bcrypt wait, or a login burst drains the DB pool
+        db.rollback()
+        return row
+
+    user = await run_in_threadpool(lookup)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid username or password")
+
+    verified, new_hash = await verify_and_update_password(request.password, user.passwordHash)
+    if not verified:
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
+    if new_hash:
+        # stored hash uses outdated settings (e.g. fewer bcrypt rounds); upgrade it transparently
+        def upgrade():
+            db.query(User).filter(User.id == user.id).update(
+                {User.passwordHash: new_hash}, synchronize_session=False
+            )
+            db.commit()
+
+        await run_in_threadpool(upgrade)
+
     access_token = create_access_token({
         "sub": str(user.id),
         "role": user.role
@@ -78,9 +105,10 @@ def read_users_me(
         raise HTTPException(status_code=400, detail="Invalid user role")
 
 @router.post("/forgot-password")
-def forgot_password(payload: ForgotPasswordRequest, db: Session = Depends(get_db)):
+def forgot_password(payload: ForgotPasswordRequest, request: Request, db: Session = Depends(get_db)):
     """Accepts an email, finds a related user, and sends a reset link via email."""
     email = payload.email.strip().lower()
+    enforce(("forgot_ip", client_ip(request)), ("forgot_email", email))
 
     # Try to find a user via Company.email or Influencer.email ownership
     # Assumptions: users may belong to a company (company.email), or be linked to an influencer (influencer.email)
@@ -1,75 +1,144 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import tuple_
 from database import get_db
-from core.models import Company, User, Report, Campaign, ActivityLog
+from core.models import Company, ActivityLog
 from core.schemas import CompanyCreate, CompanyOut, CompanyListResponse, DashboardSummaryResponse, ActivityOut
-from usecases.auth_use import get_current_user
+from usecases.principal import get_current_principal
+from usecases.dashboard_summary import get_summary, summary_version
+from usecases.etag import make_etag, not_modified, activity_version
+from usecases.live_hub import live_hub
+from usecases.activity_feed import activity_ring, ActivityEntry, ACTIVITY_RING_SIZE
+from usecases.pagination import encode_cursor, decode_cursor
+from usecases.fast_json import encode
 from typing import Optional, List
-from datetime import datetime
+import asyncio
+import os
+
+LIVE_HEARTBEAT_INTERVAL = float(os.getenv("LIVE_HEARTBEAT_INTERVAL", "15"))  # seconds
 
 router = APIRouter()
 
 @router.get("/dashboard/summary", response_model=DashboardSummaryResponse)
 def get_dashboard_summary(
+    request: Request,
+    response: Response,
     company_id: Optional[int] = Query(None),
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
+    user=Depends(get_current_principal),
 ):
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
-
     # restrict to company
-    if user.role not in ["admin", "company"]:
+    if not user or user.role not in ["admin", "company"]:
         raise HTTPException(status_code=403)
 
-    company_id = user.company_id if user.role == "company" else None
-
-    base_query = db.query(Report)
-    if user.role == "admin":
-        if company_id:
-            base_query = base_query.filter(Report.company_id == company_id)
-    else:
-        base_query = base_query.filter(Report.company_id == user.company_id)
-
-    total_sales = base_query.with_entities(func.sum(Report.totalSales)).scalar() or 0
-    total_clicks = base_query.with_entities(func.sum(Report.totalClicks)).scalar() or 0
-    total_commission = base_query.with_entities(func.sum(Report.brandCommissionAmount)).scalar() or 0
-    active_campaigns = db.query(Campaign).filter(
-        Campaign.endDate >= datetime.utcnow()
-    )
-    if company_id:
-        active_campaigns = active_campaigns.filter(Campaign.company_id == company_id)
+    # admins may pick a company (or see all of them); companies always see their own
+    if user.role == "company":
+        if not user.company_id:
+            raise HTTPException(status_code=403, detail="No company assigned")
+        company_id = user.company_id
 
-    count_active = active_campaigns.count()
+    # polling clients holding the current version get a 304 before the summary is touched
+    version = summary_version(db, company_id)
+    etag = make_etag("dashboard-summary", company_id, version)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    response.headers["ETag"] = etag
 
-    return {
-        "activeCampaigns": count_active,
-        "totalClicks": total_clicks,
-        "totalSales": total_sales,
-        "totalCommission": total_commission
-    }
+    # one aggregate statement over the report rollup, cached per company until the next write
+    return get_summary(db, company_id, version)
 
 @router.get("/dashboard/activity", response_model=List[ActivityOut])
 def get_activity_feed(
+    request: Request,
+    response: Response,
     company_id: Optional[int] = Query(None),
+    before: Optional[str] = Query(None),  # X-Next-Cursor of the previous page
+    limit: int = Query(10, ge=1, le=100),
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    user=Depends(get_current_principal)
 ):
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
-
-    if user.role not in ["admin", "company"]:
+    if not user or user.role not in ["admin", "company"]:
         raise HTTPException(status_code=403)
 
-    query = db.query(ActivityLog).order_by(ActivityLog.timestamp.desc()).limit(10)
-
-    if user.role == "admin":
-        if company_id:
-            query = query.filter(ActivityLog.company_id == company_id)
-    else:
-        query = query.filter(ActivityLog.company_id == user.company_id)
-
-    return query.all()
-
-
+    # a company account without a company must not fall through to the admin's all-companies scope
+    if user.role == "company" and not user.company_id:
+        raise HTTPException(status_code=403, detail="No company assigned")
 
+    scope = company_id if user.role == "admin" else user.company_id
+    query = db.query(
+        ActivityLog.id, ActivityLog.company_id, ActivityLog.type, ActivityLog.label, ActivityLog.timestamp
+    )
+    if scope:
+        query = query.filter(ActivityLog.company_id == scope)
+    query = query.order_by(ActivityLog.timestamp.desc(), ActivityLog.id.desc())
+
+    after = decode_cursor(before)
+    entries = None
+    if after is None:
+        # first page straight from the in-memory ring: no query while it is fresh, one
+        # LIMIT seek to reseed it once it is older than ACTIVITY_RING_TTL
+        cached = activity_ring.latest(scope, limit)
+        if cached is None and limit <= ACTIVITY_RING_SIZE:
+            seeded = [ActivityEntry(*row) for row in query.limit(ACTIVITY_RING_SIZE)]
+            activity_ring.seed(scope, seeded)
+            cached = seeded[:limit], max((e.id for e in seeded), default=None)
+        if cached is not None:
+            entries, newest = cached
+            version = (newest,)
+    if entries is None:
+        version = activity_version(db, scope)
+
+    etag = make_etag("dashboard-activity", scope, request.url.query, version)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    response.headers["ETag"] = etag
+
+    if entries is None:
+        if after is not None:
+            query = query.filter(tuple_(ActivityLog.timestamp, ActivityLog.id) < after)
+        entries = [ActivityEntry(*row) for row in query.limit(limit)]
+
+    if len(entries) == limit and entries[-1].timestamp:
+        response.headers["X-Next-Cursor"] = encode_cursor(entries[-1].timestamp, entries[-1].id)
+
+    return [{"type": e.type, "label": e.label, "timestamp": e.timestamp} for e in entries]
+
+
+@router.get("/dashboard/stream")
+async def dashboard_stream(
+    request: Request,
+    company_id: Optional[int] = Query(None),
+    user=Depends(get_current_principal),
+):
+    """Server-sent events with coalesced per-company deltas (clicks, new reports, activity)."""
+    if not user or user.role not in ["admin", "company"]:
+        raise HTTPException(status_code=403)
 
+    # admins without a company_id follow every company (live_hub's None subscription), so a
+    # company account without a company must not get there
+    if user.role == "company" and not user.company_id:
+        raise HTTPException(status_code=403, detail="No company assigned")
+    scope = company_id if user.role == "admin" else user.company_id
+
+    async def events():
+        subscriber = live_hub.subscribe(scope)
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    delta = await asyncio.wait_for(subscriber.get(), timeout=LIVE_HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"  # keeps proxies from closing an idle stream
+                    continue
+                yield f"event: delta\ndata: {encode(delta).decode()}\n\n"
+        finally:
+            live_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
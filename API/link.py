@@ -1,26 +1,41 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, BackgroundTasks
+from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session, selectinload
-from database import get_db, frontend_url
-from core.models import Campaign, Report, User, TrackingLink, ActivityLog, LinkClicksDaily
+from database import get_db, frontend_url, SessionLocal
+from core.models import Campaign, Report, TrackingLink, ActivityLog
 from core.schemas import CampaignListResponse, CampaignOut, ReportOut, ReportListResponse, GenerateLinkRequest, GenerateLinkResponse, GeneratedLinkData
-from usecases.auth_use import get_current_user, create_link_token
+from usecases.auth_use import create_link_token
+from usecases.principal import get_current_principal
+from usecases.click_buffer import click_buffer, write_click_deltas, hour_bucket, CLICK_INGEST_MODE
+from usecases.link_cache import resolve_link, prime_link, link_cache, token_key
+from usecases.click_stats import client_fingerprint, client_ip, unique_visitors
+from usecases.hll import HyperLogLog
+from usecases.short_code import new_short_code, LINK_TOKEN_SCHEME
+from usecases.click_rollups import click_series, RESOLUTIONS
+from usecases.click_filter import click_filter, CLICK_DEDUPE_ENABLED
+from usecases.click_journal import click_journal
+from usecases.rate_limit import enforce, limiters
+from usecases.live_hub import live_hub
 from typing import Optional
-from datetime import datetime, date
+from datetime import datetime
 import logging
+import os
 from decimal import Decimal
 
 logger = logging.getLogger(__name__)
 
+# Public base for generated links. When set, links point at the 302 endpoint (/r/{token})
+# instead of the frontend's /track page.
+LINK_REDIRECT_BASE_URL = os.getenv("LINK_REDIRECT_BASE_URL")
+
 router = APIRouter()
 
 @router.put("/Affiliate/GenerateLink", response_model=GenerateLinkResponse)
 def generate_link(
     body: GenerateLinkRequest,
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    user=Depends(get_current_principal)
 ):
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
-
     if not user or user.role not in ["company", "admin"]:
         raise HTTPException(status_code=403, detail="Access denied")
 
@@ -58,11 +73,15 @@ def generate_link(
         }
 
     # Create new link
-    link_token = create_link_token({
-        "sub": body.influencerID,
-        "name": body.influencerName,
-        "campaignID": body.campaignID
-    })
+    short_code = None
+    if LINK_TOKEN_SCHEME == "short":
+        short_code = link_token = new_short_code()
+    else:
+        link_token = create_link_token({
+            "sub": body.influencerID,
+            "name": body.influencerName,
+            "campaignID": body.campaignID
+        })
     
     a = datetime.utcnow()
     new_link = TrackingLink(
@@ -70,8 +89,12 @@ def generate_link(
         influencer_name=body.influencerName,
         campaignId=body.campaignID,
         company_id=campaign.company_id,
-        generated_url=f"{frontend_url}/track?token={link_token}",
+        generated_url=(
+            f"{LINK_REDIRECT_BASE_URL}/r/{link_token}" if LINK_REDIRECT_BASE_URL
+            else f"{frontend_url}/track?token={link_token}"
+        ),
         token=link_token,
+        short_code=short_code,
         status="active",
         source="local",
         click_count=0,
@@ -94,6 +117,7 @@ def generate_link(
         db.rollback()
         logger.error(f"Error: {e}")
         raise HTTPException(status_code=500)
+    prime_link(new_link)
 
     response_data = GeneratedLinkData(
         campaignID=campaign.id,
@@ -109,32 +133,63 @@ def generate_link(
         "type": 0
     }
 
+def _count_click(
+    link_id: int,
+    fingerprint: int,
+    user_agent: Optional[str],
+    referer: Optional[str],
+    db: Optional[Session] = None,
+    company_id: Optional[int] = None,
+):
+    """Dedupe, journal and count one click. Opens its own session only in sync ingest mode."""
+    # refresh storms and crawlers still get the link, but are neither counted nor written
+    if CLICK_DEDUPE_ENABLED and click_filter.classify(link_id, fingerprint, user_agent) != "ok":
+        return
+
+    if click_journal:
+        click_journal.append(link_id, fingerprint, referer)
+    live_hub.publish_clicks(company_id, link_id)
+
+    if CLICK_INGEST_MODE == "buffered":
+        # counted in memory, flushed to click_count / LinkClicksDaily in bulk
+        click_buffer.record(link_id, fingerprint=fingerprint)
+        return
+
+    # atomic increments: no read-modify-write on click_count or the daily row
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        hour = hour_bucket()
+        sketch = HyperLogLog()
+        sketch.add_hash(fingerprint)
+        write_click_deltas(db, {(link_id, hour): 1}, {(link_id, hour.date()): sketch})
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error counting click for link {link_id}: {e}")
+    finally:
+        if own_session:
+            db.close()
+
+
 @router.get("/track/{token}")
-def track_link(token: str, db: Session = Depends(get_db)):
-    link = db.query(TrackingLink).filter(TrackingLink.token == token).first()
+def track_link(token: str, request: Request, db: Session = Depends(get_db)):
+    ip = client_ip(request)
+    enforce(("track_ip", ip), ("track_token", (ip, token_key(token))))
+
+    # served from the in-process link cache for hot links; DB only on a miss
+    link = resolve_link(db, token)
     if not link:
         raise HTTPException(status_code=404, detail="Link not found")
 
-    # Increment click count
-    link.click_count += 1
-
-    today = date.today()
-    daily = db.query(LinkClicksDaily).filter(
-        LinkClicksDaily.link_id == link.id,
-        LinkClicksDaily.date == today
-    ).first()
-    if daily:
-        daily.clicks += 1
-    else:
-        daily = LinkClicksDaily(
-            link_id=link.id,
-            date=today,
-            clicks=1,
-            unique_clicks=1
-        )
-        db.add(daily)
-
-    db.commit()
+    _count_click(
+        link.id,
+        client_fingerprint(request),
+        request.headers.get("user-agent"),
+        request.headers.get("referer"),
+        db,
+        company_id=link.company_id,
+    )
 
     return {
         "data": {
@@ -145,4 +200,163 @@ def track_link(token: str, db: Session = Depends(get_db)):
         "isSuccess": True,
         "message": None,
         "type": 0
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/r/{token}")
+def redirect_link(token: str, request: Request, background_tasks: BackgroundTasks):
+    """One-hop 302 to the landing page; click accounting runs after the response is sent."""
+    ip = client_ip(request)
+    enforce(("track_ip", ip), ("track_token", (ip, token_key(token))))
+
+    # the session only checks out a connection on a cache miss
+    db = SessionLocal()
+    try:
+        link = resolve_link(db, token)
+    finally:
+        db.close()
+    if not link or not link.landing_url:
+        raise HTTPException(status_code=404, detail="Link not found")
+    # paused / archived links stop redirecting; rows predating the status column count as active
+    if (link.status or "active") != "active":
+        raise HTTPException(status_code=410, detail="Link is no longer active")
+
+    background_tasks.add_task(
+        _count_click,
+        link.id,
+        client_fingerprint(request),
+        request.headers.get("user-agent"),
+        request.headers.get("referer"),
+        company_id=link.company_id,
+    )
+    return RedirectResponse(link.landing_url, status_code=302)
+
+
+def _check_link_scope(db: Session, user, linkID: Optional[int], campaignID: Optional[int]):
+    if not user or user.role not in ["company", "admin"]:
+        raise HTTPException(status_code=403, detail="Access denied")
+    if not linkID and not campaignID:
+        raise HTTPException(status_code=400, detail="linkID or campaignID is required")
+
+    # Company users may only query their own links/campaigns
+    if user.role == "company":
+        if linkID:
+            owner = db.query(TrackingLink.company_id).filter(TrackingLink.id == linkID).scalar()
+        else:
+            owner = db.query(Campaign.company_id).filter(Campaign.id == campaignID).scalar()
+        if owner != user.company_id:
+            raise HTTPException(status_code=403, detail="Access denied")
+
+
+@router.get("/links/unique-clicks")
+def get_unique_clicks(
+    linkID: Optional[int] = Query(None),
+    campaignID: Optional[int] = Query(None),
+    StartDate: Optional[str] = Query(None),
+    EndDate: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_principal)
+):
+    _check_link_scope(db, user, linkID, campaignID)
+
+    # Date filters (DD.MM.YYYY)
+    try:
+        start = datetime.strptime(StartDate, "%d.%m.%Y").date() if StartDate else None
+        end = datetime.strptime(EndDate, "%d.%m.%Y").date() if EndDate else None
+    except ValueError:
+        return {"data": None, "isSuccess": False, "message": "Invalid date", "type": 1}
+
+    count = unique_visitors(
+        db,
+        link_ids=[linkID] if linkID else None,
+        campaign_id=campaignID,
+        start=start,
+        end=end,
+    )
+    return {
+        "data": {"linkID": linkID, "campaignID": campaignID, "uniqueClicks": count},
+        "isSuccess": True,
+        "message": None,
+        "type": 0
+    }
+
+
+@router.get("/links/clicks")
+def get_link_clicks(
+    start: datetime = Query(...),
+    end: datetime = Query(...),
+    linkID: Optional[int] = Query(None),
+    campaignID: Optional[int] = Query(None),
+    resolution: Optional[str] = Query(None, description="hour | day | month; picked from the range if omitted"),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_principal)
+):
+    _check_link_scope(db, user, linkID, campaignID)
+
+    if end <= start or (resolution and resolution not in RESOLUTIONS):
+        return {"data": None, "isSuccess": False, "message": "Invalid range or resolution", "type": 1}
+
+    if linkID:
+        link_ids = [linkID]
+    else:
+        link_ids = [i for (i,) in db.query(TrackingLink.id).filter(TrackingLink.campaignId == campaignID)]
+
+    used, series = click_series(db, link_ids, start, end, resolution)
+    return {
+        "data": {
+            "resolution": used,
+            "points": [{"bucket": bucket, "clicks": n} for bucket, n in series],
+            "total": sum(n for _, n in series),
+        },
+        "isSuccess": True,
+        "message": None,
+        "type": 0
+    }
+
+
+@router.get("/track-filter/stats")
+def track_filter_stats(
+    db: Session = Depends(get_db),
+    user=Depends(get_current_principal)
+):
+    if not user or user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return {
+        "data": click_filter.stats(),
+        "isSuccess": True,
+        "message": None,
+        "type": 0
+    }
+
+
+@router.get("/track-cache/stats")
+def track_cache_stats(
+    db: Session = Depends(get_db),
+    user=Depends(get_current_principal)
+):
+    if not user or user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return {
+        "data": link_cache.stats(),
+        "isSuccess": True,
+        "message": None,
+        "type": 0
+    }
+
+
+@router.get("/rate-limit/stats")
+def rate_limit_stats(
+    db: Session = Depends(get_db),
+    user=Depends(get_current_principal)
+):
+    if not user or user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    return {
+        "data": {name: limiter.stats() for name, limiter in limiters.items()},
+        "isSuccess": True,
+        "message": None,
+        "type": 0
+    }
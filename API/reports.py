@@ -1,13 +1,29 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session, selectinload
-from API import user
-from database import get_db
-from core.models import Report, Campaign, User, Influencer, ActivityLog
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, distinct, tuple_, select, insert
+from sqlalchemy.orm import Session, aliased
+from database import get_db, SessionLocal
+from core.models import Report, ReportRollup, Campaign, Influencer, ActivityLog, TrackingLink
 from core.schemas import ReportCreate, ReportOut, ReportListResponse
-from usecases.auth_use import get_current_user
+from usecases.principal import get_current_principal
+from usecases.pagination import encode_cursor, decode_cursor
+from usecases.fast_json import json_bytes_response, shape_rows, columns_of
+from usecases.etag import make_etag, not_modified, report_version
+from usecases.report_rollup import add_reports_to_rollup, SUM_COLUMNS
+from usecases.click_rollups import click_series, daily_cutoff, month_start, next_month
+from usecases import report_analytics as analytics
+from usecases.live_hub import live_hub
+from pydantic import ValidationError
 from decimal import Decimal
-from typing import Optional
-from datetime import datetime, timedelta
+from typing import List, Optional
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+import csv
+import io
+import json
+import os
+import tempfile
 import logging
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -16,20 +32,17 @@ router = APIRouter()
 def create_report(
     report_in: ReportCreate,
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    user=Depends(get_current_principal)
 ):
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
-
     # Role-based permission
     if not user or user.role not in ["admin", "influencer"]:
         raise HTTPException(status_code=403, detail="Unauthorized role")
 
     # If the caller is an influencer, map their User -> Influencer.id
     if user.role == "influencer":
-        infl = db.query(Influencer).filter(Influencer.user_id == user.id).first()
-        if not infl:
+        if not user.influencer_id:
             raise HTTPException(status_code=404, detail="Influencer profile not found")
-        report_in.influencer_id = infl.id
+        report_in.influencer_id = user.influencer_id
 
     # Admin must provide a valid influencerId if not set already
     if not report_in.influencer_id:
@@ -64,8 +77,11 @@ def create_report(
     try:
         db.add(report)
         db.add(log)
+        db.flush()
+        add_reports_to_rollup(db, [report])
         db.commit()
         db.refresh(report)
+        live_hub.publish_reports(report.company_id, [report])
     except Exception as e:
         db.rollback()
         logger.error(f"Error creating report: {e}")
@@ -74,91 +90,554 @@ def create_report(
     return report
 
 
-@router.get("/Affiliate/GetReport", response_model=ReportListResponse)
-def get_report(
-    InfluencerID: Optional[str] = Query(None),
-    StartDate: Optional[str] = Query(None),
-    EndDate: Optional[str] = Query(None),
-    company_id: Optional[int] = Query(None),  # Admin can override
+# --- bulk ingestion ---
+
+REPORT_BULK_MAX_ITEMS = int(os.getenv("REPORT_BULK_MAX_ITEMS", "50000"))
+REPORT_BULK_CHUNK_SIZE = int(os.getenv("REPORT_BULK_CHUNK_SIZE", "1000"))
+
+
+async def _read_bulk_items(request: Request):
+    """Parses a JSON array or NDJSON body into (index, raw item) pairs plus per-row parse errors."""
+    items, errors = [], []
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        index, pending = 0, b""
+
+        def take(line: bytes):
+            nonlocal index
+            if line.strip():
+                try:
+                    items.append((index, json.loads(line)))
+                except ValueError as e:
+                    errors.append({"index": index, "message": f"Invalid JSON: {e}"})
+                index += 1
+
+        async for chunk in request.stream():
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                take(line)
+            if index > REPORT_BULK_MAX_ITEMS:
+                break
+        take(pending)
+    else:
+        try:
+            body = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        items = list(enumerate(body))
+
+    if len(items) + len(errors) > REPORT_BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {REPORT_BULK_MAX_ITEMS} reports per batch")
+    return items, errors
+
+
+def _ingest_reports(db: Session, user, items, errors) -> int:
+    valid = []
+    for index, raw in items:
+        try:
+            report_in = ReportCreate.model_validate(raw)
+        except ValidationError as e:
+            message = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            errors.append({"index": index, "message": message})
+            continue
+        if user.role == "influencer":
+            report_in.influencer_id = user.influencer_id
+        if not report_in.influencer_id:
+            errors.append({"index": index, "message": "influencer id is required"})
+            continue
+        valid.append((index, report_in))
+
+    # one set-based lookup per referenced table instead of one query per row
+    campaigns = {
+        cid: (company_id, name)
+        for cid, company_id, name in db.query(Campaign.id, Campaign.company_id, Campaign.name)
+        .filter(Campaign.id.in_({r.campaignId for _, r in valid}))
+    }
+    influencers = {
+        iid for (iid,) in db.query(Influencer.id).filter(Influencer.id.in_({r.influencer_id for _, r in valid}))
+    }
+
+    rows = []
+    now = datetime.utcnow()
+    for index, r in valid:
+        if r.campaignId not in campaigns:
+            errors.append({"index": index, "message": "Campaign not found"})
+        elif r.influencer_id not in influencers:
+            errors.append({"index": index, "message": "Influencer not found"})
+        else:
+            rows.append((index, {**r.model_dump(), "company_id": campaigns[r.campaignId][0], "createdAt": now}))
+
+    inserted = 0
+    for start in range(0, len(rows), REPORT_BULK_CHUNK_SIZE):
+        chunk = rows[start:start + REPORT_BULK_CHUNK_SIZE]
+        values = [row for _, row in chunk]
+        touched = {row["campaignId"] for row in values}
+        try:
+            db.execute(insert(Report), values)  # executemany
+            add_reports_to_rollup(db, values)
+            db.add_all(
+                ActivityLog(company_id=campaigns[cid][0], type="Reports imported.", label=campaigns[cid][1])
+                for cid in touched if campaigns[cid][0] is not None
+            )
+            db.commit()
+            inserted += len(chunk)
+            for cid in touched:
+                live_hub.publish_reports(
+                    campaigns[cid][0], [row for row in values if row["campaignId"] == cid]
+                )
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error bulk inserting reports: {e}")
+            errors.extend({"index": index, "message": "Database error"} for index, _ in chunk)
+    return inserted
+
+
+@router.post("/reports/bulk", tags=["Reports"])
+async def create_reports_bulk(
+    request: Request,
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    user=Depends(get_current_principal)
 ):
-    # Fetch the full user from DB to access company_id
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
+    """Creates many reports from a JSON array or NDJSON (application/x-ndjson) body.
 
-    if user.role == "influencer":
-        influencer = db.query(Influencer).filter(Influencer.user_id == user.id).first()
-        if not influencer:
-            raise HTTPException(status_code=404, detail="Influencer profile not found")
-        reports = db.query(Report).filter(Report.influencer_id == influencer.id).all()
-        return {
-            "data": [ReportOut.model_validate(r, from_attributes=True) for r in reports],
-            "isSuccess": True,
-            "message": None,
-            "type": 0,
-            "activeInfluencers": 1 if reports else 0,
-            "totalInfluencerCommission": sum(
-                (r.influencerCommissionAmount or Decimal("0.00")) for r in reports
-            ),
-        }
+    Invalid rows are reported by their position and skipped; the rest is inserted in chunks.
+    """
+    if not user or user.role not in ["admin", "influencer"]:
+        raise HTTPException(status_code=403, detail="Unauthorized role")
+    if user.role == "influencer" and not user.influencer_id:
+        raise HTTPException(status_code=404, detail="Influencer profile not found")
+
+    items, errors = await _read_bulk_items(request)
+    inserted = await run_in_threadpool(_ingest_reports, db, user, items, errors)
+
+    return {
+        "data": {"inserted": inserted, "errors": sorted(errors, key=lambda e: e["index"])},
+        "isSuccess": not errors,
+        "message": f"{len(errors)} row(s) rejected" if errors else None,
+        "type": 0 if not errors else 1
+    }
 
-    if not user or user.role not in ["company", "admin"]:
-        raise HTTPException(status_code=403, detail="Access denied")
 
-    query = db.query(Report)
+def _apply_report_filters(
+    query,
+    model,
+    user,
+    InfluencerID: Optional[str] = None,
+    StartDate: Optional[str] = None,
+    EndDate: Optional[str] = None,
+    company_id: Optional[int] = None,
+):
+    """Scopes a Report or ReportRollup query to the caller. Raises ValueError for unparseable dates."""
+    if not user or user.role not in ["company", "admin", "influencer"]:
+        raise HTTPException(status_code=403, detail="Access denied")
 
-    # Company scoping
-    if user.role == "admin":
-        if company_id:
-            query = query.filter(Report.company_id == company_id)
+    if user.role == "influencer":
+        if not user.influencer_id:
+            raise HTTPException(status_code=404, detail="Influencer profile not found")
+        query = query.filter(model.influencer_id == user.influencer_id)
     else:
-        query = query.filter(Report.company_id == user.company_id)
+        # Company scoping
+        if user.role == "admin":
+            if company_id:
+                query = query.filter(model.company_id == company_id)
+        else:
+            query = query.filter(model.company_id == user.company_id)
 
-    # Influencer filter: accept numeric (our PK) or string mlink_id
-    if InfluencerID:
-        try:
-            infl_id_int = int(InfluencerID)
-            query = query.filter(Report.influencer_id == infl_id_int)
-        except ValueError:
-            # treat as external mlink_id
-            query = query.join(Influencer, Report.influencer_id == Influencer.id) \
-                         .filter(Influencer.mlink_id == InfluencerID)
+        # Influencer filter: accept numeric (our PK) or string mlink_id
+        if InfluencerID:
+            try:
+                infl_id_int = int(InfluencerID)
+                query = query.filter(model.influencer_id == infl_id_int)
+            except ValueError:
+                # treat as external mlink_id
+                query = query.filter(
+                    model.influencer_id.in_(select(Influencer.id).where(Influencer.mlink_id == InfluencerID))
+                )
 
-    # Date filters (DD.MM.YYYY)
+    # Date filters (DD.MM.YYYY); the rollup is bucketed by createdAt's date
     if StartDate:
         try:
             start_dt = datetime.strptime(StartDate, "%d.%m.%Y")
-            query = query.filter(Report.createdAt >= start_dt)
         except ValueError:
-            return {"data": [], "isSuccess": False, "message": "Invalid StartDate", "type": 1}
+            raise ValueError("Invalid StartDate")
+        if model is ReportRollup:
+            query = query.filter(ReportRollup.day >= start_dt.date())
+        else:
+            query = query.filter(Report.createdAt >= start_dt)
 
     if EndDate:
         try:
             end_dt = datetime.strptime(EndDate, "%d.%m.%Y") + timedelta(days=1)
-            query = query.filter(Report.createdAt <= end_dt)
         except ValueError:
-            return {"data": [], "isSuccess": False, "message": "Invalid EndDate", "type": 1}
+            raise ValueError("Invalid EndDate")
+        if model is ReportRollup:
+            query = query.filter(ReportRollup.day < end_dt.date())
+        else:
+            query = query.filter(Report.createdAt <= end_dt)
+
+    return query
+
+
+def _build_report_query(db: Session, user, *filters):
+    return _apply_report_filters(db.query(Report), Report, user, *filters)
 
-    query = query.options(
-        selectinload(Report.influencer),
-        selectinload(Report.campaign)
-    )
 
-    reports = query.all()
+def _report_totals(db: Session, user, *filters):
+    """(activeInfluencers, totalInfluencerCommission) for the filtered set, read from ReportRollup."""
+    query = _apply_report_filters(db.query(ReportRollup), ReportRollup, user, *filters)
+    return query.with_entities(
+        func.count(distinct(func.nullif(ReportRollup.influencer_id, 0))),
+        func.coalesce(func.sum(ReportRollup.influencerCommissionAmount), Decimal("0.00")),
+    ).one()
 
-    # Active influencers in the *filtered* set
-    active_influencers = len({r.influencer_id for r in reports})
 
-    # Sum influencer commission across the filtered set
-    total_influencer_commission = sum(
-        (r.influencerCommissionAmount or Decimal("0.00")) for r in reports
+_infl = aliased(Influencer)
+_camp = aliased(Campaign)
+
+# ReportOut fields, selected as plain columns (names resolved by join, not per-row lazy loads)
+REPORT_COLUMNS = [
+    Report.id, Report.influencer_id, Report.campaignId, Report.totalClicks, Report.totalSales, Report.createdAt,
+    Report.brandCommissionRate, Report.brandCommissionAmount,
+    Report.influencerCommissionRate, Report.influencerCommissionAmount, Report.otherCostsRate,
+    Report.mimedaCommissionRate, Report.mimedaCommissionAmount,
+    Report.agencyCommissionRate, Report.agencyCommissionAmount,
+    _infl.display_name.label("influencerName"), _camp.name.label("campaignName"),
+]
+REPORT_COLUMN_NAMES = columns_of(REPORT_COLUMNS)
+
+
+def _report_rows(query):
+    """Filtered report query -> Core row tuples in REPORT_COLUMNS order, newest first."""
+    return (
+        query.outerjoin(_infl, _infl.id == Report.influencer_id)
+        .outerjoin(_camp, _camp.id == Report.campaignId)
+        .with_entities(*REPORT_COLUMNS)
+        .order_by(Report.createdAt.desc(), Report.id.desc())
     )
 
-    return {
-        "data": [ReportOut.model_validate(r, from_attributes=True) for r in reports],
+
+@router.get("/Affiliate/GetReport", response_model=ReportListResponse)
+def get_report(
+    request: Request,
+    InfluencerID: Optional[str] = Query(None),
+    StartDate: Optional[str] = Query(None),
+    EndDate: Optional[str] = Query(None),
+    company_id: Optional[int] = Query(None),  # Admin can override
+    cursor: Optional[str] = Query(None),      # nextCursor of the previous page
+    limit: int = Query(100, ge=1, le=1000),
+    shape: str = Query("rows", pattern="^(rows|columns)$"),  # 'columns' -> data as {field: [values]}
+    db: Session = Depends(get_db),
+    user=Depends(get_current_principal)
+):
+    try:
+        query = _build_report_query(db, user, InfluencerID, StartDate, EndDate, company_id)
+    except ValueError as e:
+        return {
+            "data": [], "isSuccess": False, "message": str(e), "type": 1,
+            "activeInfluencers": None, "totalInfluencerCommission": None,
+        }
+
+    after = decode_cursor(cursor)
+
+    # unchanged filtered set (same page/shape via the query string) -> 304 before totals and rows
+    scope = (user.role, user.company_id, user.influencer_id)
+    if user.role == "influencer":
+        version = report_version(db, influencer_id=user.influencer_id)
+    else:
+        version = report_version(db, company_id=company_id if user.role == "admin" else user.company_id)
+    etag = make_etag("reports", scope, request.url.query, version)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    # Totals over the whole filtered set, from the rollup; only the first page pays for them
+    active_influencers = total_influencer_commission = None
+    if after is None:
+        active_influencers, total_influencer_commission = _report_totals(
+            db, user, InfluencerID, StartDate, EndDate, company_id
+        )
+
+    page = query
+    if after is not None:
+        page = page.filter(tuple_(Report.createdAt, Report.id) < after)
+    rows = _report_rows(page).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].createdAt, rows[-1].id)
+
+    # plain tuples encoded straight to JSON bytes; no ORM instances or per-row model validation
+    return json_bytes_response({
+        "data": shape_rows(REPORT_COLUMN_NAMES, rows, shape),
         "activeInfluencers": active_influencers,
         "totalInfluencerCommission": total_influencer_commission,
+        "nextCursor": next_cursor,
         "isSuccess": True,
         "message": None,
         "type": 0
-    }
\ No newline at end of file
+    }, headers={"ETag": etag})
+
+
+# --- analytics ---
+
+@router.get("/reports/analytics", tags=["Reports"])
+def report_analytics(
+    dimensions: Optional[str] = Query(None, description="comma separated: company, campaign, influencer"),
+    metrics: str = Query("totalSales,totalClicks,influencerCommissionAmount"),
+    bucket: Optional[str] = Query(None, pattern="^(day|week|month)$"),
+    pivot: Optional[str] = Query(None, description="dimension (or 'period') spread across columns"),
+    InfluencerID: Optional[str] = Query(None),
+    StartDate: Optional[str] = Query(None),
+    EndDate: Optional[str] = Query(None),
+    company_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_principal)
+):
+    """Group-by / pivot breakdowns of report metrics, computed with pandas over the report rollup."""
+    dims = [d.strip() for d in dimensions.split(",") if d.strip()] if dimensions else []
+    mets = [m.strip() for m in metrics.split(",") if m.strip()]
+    if any(d not in analytics.DIMENSIONS for d in dims):
+        raise HTTPException(status_code=400, detail=f"dimensions must be among {', '.join(analytics.DIMENSIONS)}")
+    if not mets or any(m not in analytics.METRICS for m in mets):
+        raise HTTPException(status_code=400, detail=f"metrics must be among {', '.join(analytics.METRICS)}")
+    if pivot and pivot not in analytics.DIMENSIONS and not (pivot == "period" and bucket):
+        raise HTTPException(status_code=400, detail="pivot must be a dimension, or 'period' with a bucket")
+    if pivot and len(mets) != 1:
+        raise HTTPException(status_code=400, detail="pivot takes exactly one metric")
+
+    try:
+        query = _apply_report_filters(
+            db.query(ReportRollup), ReportRollup, user, InfluencerID, StartDate, EndDate, company_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    frame = analytics.load_frame(query)
+    if frame.empty:
+        data = {"rows": []}
+    elif pivot:
+        data = analytics.pivot_payload(analytics.pivot(frame, dims, mets[0], pivot, bucket))
+    else:
+        data = {"rows": analytics.frame_records(analytics.aggregate(frame, dims, mets, bucket))}
+
+    return {
+        "data": data,
+        "isSuccess": True,
+        "message": None,
+        "type": 0
+    }
+
+
+# --- time series ---
+
+TIMESERIES_MAX_POINTS = 1000
+
+
+def _bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return month_start(day)
+    return day
+
+
+def _bucket_starts(first: date, last: date, bucket: str) -> List[date]:
+    starts, current = [], _bucket_start(first, bucket)
+    while current <= last:
+        starts.append(current)
+        if bucket == "month":
+            current = next_month(current)
+        else:
+            current += timedelta(days=7 if bucket == "week" else 1)
+    return starts
+
+
+@router.get("/reports/timeseries", tags=["Reports"])
+def report_timeseries(
+    bucket: str = Query("day", pattern="^(day|week|month)$"),
+    InfluencerID: Optional[str] = Query(None),
+    StartDate: Optional[str] = Query(None),   # DD.MM.YYYY, defaults to 30 days before EndDate
+    EndDate: Optional[str] = Query(None),     # DD.MM.YYYY, defaults to today
+    company_id: Optional[int] = Query(None),
+    campaignID: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_principal)
+):
+    """Zero-filled per-bucket report totals and tracked link clicks, ready for charting."""
+    try:
+        last = datetime.strptime(EndDate, "%d.%m.%Y").date() if EndDate else datetime.utcnow().date()
+        first = datetime.strptime(StartDate, "%d.%m.%Y").date() if StartDate else last - timedelta(days=29)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid StartDate or EndDate")
+    if first > last:
+        raise HTTPException(status_code=400, detail="StartDate is after EndDate")
+    # clicks before the cutoff only survive as monthly totals, which day/week buckets cannot split
+    cutoff = daily_cutoff()
+    if bucket != "month" and first < cutoff:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Daily click data before {cutoff.strftime('%d.%m.%Y')} is compacted; use bucket=month",
+        )
+    starts = _bucket_starts(first, last, bucket)
+    if len(starts) > TIMESERIES_MAX_POINTS:
+        raise HTTPException(status_code=400, detail="Range too long for this bucket")
+
+    def scoped(query, model, with_dates=True):
+        query = _apply_report_filters(
+            query, model, user, InfluencerID,
+            first.strftime("%d.%m.%Y") if with_dates else None,
+            last.strftime("%d.%m.%Y") if with_dates else None,
+            company_id,
+        )
+        return query.filter(model.campaignId == campaignID) if campaignID else query
+
+    points = {
+        start: {"reports": 0, **{col: 0 for col in SUM_COLUMNS}, "linkClicks": 0} for start in starts
+    }
+
+    # reports: per-day sums from the rollup, folded into buckets
+    rows = (
+        scoped(db.query(ReportRollup), ReportRollup)
+        .with_entities(
+            ReportRollup.day,
+            func.sum(ReportRollup.reports),
+            *[func.sum(getattr(ReportRollup, col)) for col in SUM_COLUMNS],
+        )
+        .group_by(ReportRollup.day)
+        .all()
+    )
+    for day, *sums in rows:
+        point = points.get(_bucket_start(day, bucket))
+        if point is None:
+            continue
+        for col, value in zip(("reports", *SUM_COLUMNS), sums):
+            point[col] += value or 0
+
+    # tracked clicks of the links in the same scope (LinkClicksDaily / LinkClicksMonthly)
+    link_ids = scoped(db.query(TrackingLink.id), TrackingLink, with_dates=False).statement
+    click_resolution, clicks = click_series(
+        db,
+        link_ids,
+        datetime.combine(first, time.min),
+        datetime.combine(last + timedelta(days=1), time.min),
+        "month" if bucket == "month" else "day",
+    )
+    for at, n in clicks:
+        point = points.get(_bucket_start(at.date(), bucket))
+        if point is not None:
+            point["linkClicks"] += n
+
+    return {
+        "data": {
+            "bucket": bucket,
+            "clickResolution": click_resolution,
+            "points": [{"period": start.isoformat(), **values} for start, values in points.items()],
+        },
+        "isSuccess": True,
+        "message": None,
+        "type": 0
+    }
+
+
+# --- export ---
+
+EXPORT_BATCH_SIZE = int(os.getenv("REPORT_EXPORT_BATCH_SIZE", "2000"))
+# an XLSX file can only be sent once it is complete, so the client waits for the whole build;
+# larger exports are refused and pointed at CSV, which streams from the first row
+EXPORT_XLSX_MAX_ROWS = int(os.getenv("REPORT_EXPORT_XLSX_MAX_ROWS", "50000"))
+
+EXPORT_HEADER = REPORT_COLUMN_NAMES
+
+
+def _export_rows(query):
+    """Plain tuples in EXPORT_HEADER order, fetched in batches from a server-side cursor."""
+    for row in _report_rows(query).yield_per(EXPORT_BATCH_SIZE):
+        yield tuple(row)
+
+
+def _stream_csv(query):
+    # the request's session is closed before the body is sent, so the stream uses its own
+    db = SessionLocal()
+    try:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        buf.write("\ufeff")  # BOM so Excel opens UTF-8 (Turkish names) correctly
+        writer.writerow(EXPORT_HEADER)
+        for i, row in enumerate(_export_rows(query.with_session(db)), 1):
+            writer.writerow(row)
+            if i % EXPORT_BATCH_SIZE == 0:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue()
+    finally:
+        db.close()
+
+
+def _stream_xlsx(query):
+    from openpyxl import Workbook
+
+    db = SessionLocal()
+    tmp = tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False)
+    tmp.close()
+    try:
+        # write-only mode streams rows to disk instead of keeping cells in memory
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Reports")
+        ws.append(EXPORT_HEADER)
+        # backstop for rows inserted after export_reports checked the cap
+        for row in islice(_export_rows(query.with_session(db)), EXPORT_XLSX_MAX_ROWS):
+            ws.append(row)
+        wb.save(tmp.name)
+        db.close()
+
+        with open(tmp.name, "rb") as f:
+            while chunk := f.read(64 * 1024):
+                yield chunk
+    finally:
+        db.close()
+        os.unlink(tmp.name)
+
+
+@router.get("/reports/export", tags=["Reports"])
+def export_reports(
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    InfluencerID: Optional[str] = Query(None),
+    StartDate: Optional[str] = Query(None),
+    EndDate: Optional[str] = Query(None),
+    company_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_principal)
+):
+    """Same filters as GetReport, streamed as CSV or XLSX in constant memory.
+
+    XLSX is built in full before the first byte goes out and is limited to
+    REPORT_EXPORT_XLSX_MAX_ROWS rows (413 above that); use CSV for larger exports.
+    """
+    try:
+        query = _build_report_query(db, user, InfluencerID, StartDate, EndDate, company_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "xlsx":
+        # probes for row cap+1 instead of counting the whole filtered set
+        over_cap = query.with_entities(Report.id).order_by(None).offset(EXPORT_XLSX_MAX_ROWS).limit(1).first()
+        if over_cap is not None:
+            raise HTTPException(
+                status_code=413,
+                detail=f"XLSX exports are limited to {EXPORT_XLSX_MAX_ROWS} rows; use format=csv or narrow the filters",
+            )
+
+    filename = f"reports-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if format == "xlsx":
+        return StreamingResponse(
+            _stream_xlsx(query),
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            headers=headers,
+        )
+    return StreamingResponse(_stream_csv(query), media_type="text/csv; charset=utf-8", headers=headers)
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, Query, Body, HTTPException
 from typing import Optional
 from core.schemas import CampaignListResponse, CampaignOut, ReportListResponse, ReportOut, GenerateLinkRequest
-from core.models import User, Influencer
+from core.models import Influencer
 from usecases.auth_use import get_current_user  # <-- your backend JWT auth
+from usecases.principal import get_current_principal
 from usecases.client import mlink_client  # <-- updated client with auto-login
 from database import get_db
 from sqlalchemy.orm import Session, selectinload
@@ -34,23 +35,23 @@ async def mlink_reports(
     influencer_id: Optional[str] = Query(None, alias="InfluencerID"),
     start_date: Optional[str] = Query(None, alias="StartDate"),
     end_date: Optional[str] = Query(None, alias="EndDate"),
-    user=Depends(get_current_user),  
+    user=Depends(get_current_principal),  
     db: Session = Depends(get_db)
 ):
     params = {}
 
-    print(user)
-    if user["role"] == "influencer":
-        influencer = db.query(Influencer).filter(User.id == user["sub"]).first()
-        if not influencer:
+    if not user:
+        raise HTTPException(status_code=403, detail= "Access denied")
+    if user.role == "influencer":
+        if not user.influencer_id:
             raise HTTPException(status_code=404, detail="Influencer not found")
-        params["InfluencerID"] = influencer.id
+        params["InfluencerID"] = user.influencer_id
         if start_date:
             params["StartDate"] = start_date
         if end_date:
             params["EndDate"] = end_date
         return await mlink_client.get_report(params)        
-    if user["role"] not in ["company", "admin"]:
+    if user.role not in ["company", "admin"]:
         raise HTTPException(status_code=403, detail= "Access denied")
     
     
@@ -65,19 +66,21 @@ async def mlink_reports(
 @router.put("/generate-link")
 async def mlink_generate_link(
     body: GenerateLinkRequest,
-    user=Depends(get_current_user),  
+    user=Depends(get_current_principal),  
     db: Session = Depends(get_db)
 ):
     # Convert Pydantic model to dict for httpx
     body_dict = body.dict() if hasattr(body, "dict") else dict(body)
-    if user["role"] == "influencer":
-        influencer = db.query(Influencer).filter(User.id == user["sub"]).first()
+    if not user:
+        raise HTTPException(status_code=403, detail= "Access denied")
+    if user.role == "influencer":
+        influencer = db.get(Influencer, user.influencer_id) if user.influencer_id else None
         if not influencer:
             raise HTTPException(status_code=404, detail="Influencer not found") 
         body_dict["influencerID"] = str(influencer.id)
         body_dict["influencerName"] = influencer.username
         return await mlink_client.generate_link(body_dict)
-    if user["role"] not in ["company", "admin"]:
+    if user.role not in ["company", "admin"]:
         raise HTTPException(status_code=403, detail= "Access denied")
     return await mlink_client.generate_link(body_dict)
 
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
 from sqlalchemy.orm import Session, selectinload
 from database import get_db, frontend_url
-from core.models import Campaign, Report, User, TrackingLink, ActivityLog, Influencer
+from core.models import Campaign, Report, User, TrackingLink, ActivityLog, Influencer, campaign_influencers
 from core.schemas import CampaignListResponse, CampaignOut, ReportOut, ReportListResponse, GenerateLinkRequest, GenerateLinkResponse, GeneratedLinkData
 from core.schemas import ResetPasswordRequest, InfluencerUpdate
-from usecases.auth_use import get_current_user, create_link_token, decode_access_token, hash_password
+from usecases.auth_use import create_link_token, decode_access_token, hash_password
+from usecases.principal import get_current_principal
+from usecases.etag import make_etag, not_modified, campaign_version
 from typing import Optional
 from datetime import datetime
 import logging
@@ -19,20 +21,39 @@ logger = logging.getLogger(__name__)
 
 @router.get("/Affiliate/GetCampaigns", response_model=CampaignListResponse)
 def get_campaigns(
+    request: Request,
+    response: Response,
     Name: Optional[str] = Query(None),
     StartDate: Optional[str] = Query(None),
     EndDate: Optional[str] = Query(None),
     company_id: Optional[int] = Query(None),  # only used if user is admin
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    user=Depends(get_current_principal)
 ):
     
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
     if not user or user.role not in ["company", "admin", "influencer"]:
         raise HTTPException(status_code=403, detail= "Access denied")
     
+    # version of the caller's campaign scope; the query string covers the filters
     if user.role == "influencer":
-        influencer = db.query(Influencer).filter(Influencer.user_id == user.id).first()
+        version_query = db.query(Campaign).join(
+            campaign_influencers, campaign_influencers.c.campaign_id == Campaign.id
+        ).filter(campaign_influencers.c.influencer_id == user.influencer_id)
+        scope = ("influencer", user.influencer_id)
+    else:
+        scope_company = company_id if user.role == "admin" else user.company_id
+        version_query = db.query(Campaign)
+        if scope_company:
+            version_query = version_query.filter(Campaign.company_id == scope_company)
+        scope = ("company", scope_company)
+    etag = make_etag("campaigns", scope, request.url.query, campaign_version(version_query))
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    response.headers["ETag"] = etag
+
+    if user.role == "influencer":
+        influencer = db.get(Influencer, user.influencer_id) if user.influencer_id else None
         if not influencer:
             return {"data": [], "isSuccess": False, "message": "Influencer profile not found", "type": 1}
         campaigns = influencer.campaigns
@@ -119,10 +140,9 @@ def reset_password(request: ResetPasswordRequest, db: Session = Depends(get_db))
 def update_profile(
     request: InfluencerUpdate, 
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user)
+    user=Depends(get_current_principal)
 ):
     # First verify current user is authorized to update this profile
-    user = db.query(User).filter(User.id == current_user["sub"]).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
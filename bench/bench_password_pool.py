@@ -0,0 +1,101 @@
+"""Login burst: concurrent POST /login against the bounded bcrypt pool.
+
+    python -m bench.bench_password_pool [--burst 40] [--rounds 12]
+
+Fires `--burst` logins at once (default: twice PASSWORD_POOL_WORKERS + PASSWORD_POOL_QUEUE) at
+the auth router, in-process on a throwaway SQLite file. Logins beyond workers + queue must be
+refused with 503 right away instead of queueing; the rest must succeed. Reports throughput of
+the successful logins, the 503 count and the worst event loop stall during the burst.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp(prefix="bench-password-pool-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"  # never a real database
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ["RATE_LIMIT_ENABLED"] = "0"
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--burst", type=int, default=None, help="concurrent logins (default: 2 x (workers + queue))")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    return parser.parse_args()
+
+
+async def _ticker(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Longest gap between ticks beyond `interval`, in ms: how long other requests would have waited."""
+    worst = 0.0
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        now = time.perf_counter()
+        worst = max(worst, now - last - interval)
+        last = now
+    return worst * 1000
+
+
+def _setup(password: str) -> None:
+    from core.models import Base, User
+    from database import SessionLocal, engine
+    from usecases.auth_use import pwd_context
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        db.add(User(username="bench", passwordHash=pwd_context.hash(password), role="company"))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def main(args) -> None:
+    import httpx
+    from fastapi import FastAPI
+
+    from API import auth as auth_api
+    from usecases import auth_use
+
+    password = "correct horse"
+    _setup(password)
+    app = FastAPI()
+    app.include_router(auth_api.router)
+
+    capacity = auth_use.PASSWORD_POOL_WORKERS + auth_use.PASSWORD_POOL_QUEUE
+    burst = args.burst or 2 * capacity
+    body = {"username": "bench", "password": password}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        warm = await client.post("/login", json=body)  # starts the pool outside the measurement
+        assert warm.status_code == 200, warm.text
+
+        stop = asyncio.Event()
+        ticker = asyncio.create_task(_ticker(stop))
+        await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(client.post("/login", json=body) for _ in range(burst)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        stall = await ticker
+
+    auth_use.shutdown_password_pool()
+    statuses = [r.status_code for r in responses]
+    ok, busy = statuses.count(200), statuses.count(503)
+    assert ok + busy == burst, sorted(set(statuses))
+    print(f"{burst} concurrent logins in {elapsed:.2f} s: {ok} ok ({ok / elapsed:.1f} logins/s), {busy} x 503")
+    print(f"worst event loop stall {stall:.1f} ms")
+    print(
+        f"(bcrypt rounds {args.rounds}, pool workers {auth_use.PASSWORD_POOL_WORKERS}, "
+        f"queue {auth_use.PASSWORD_POOL_QUEUE}, cpus {os.cpu_count()})"
+    )
+
+
+if __name__ == "__main__":
+    arguments = _parse_args()
+    os.environ["BCRYPT_ROUNDS"] = str(arguments.rounds)  # read by auth_use at import time
+    sys.exit(asyncio.run(main(arguments)))
@@ -0,0 +1,98 @@
+"""Redirect latency: GET /r/{token} (cache hot / cold) against the JSON /track/{token} hop.
+
+    python -m bench.bench_redirect [--requests 2000]
+
+Runs the link router in-process on a throwaway SQLite file, so the numbers are for the
+app's own work (token check, link lookup, click accounting), not the network. /track is only
+the API half of the old flow: the browser first loads the frontend's /track page and then
+calls it, a round trip the one-hop 302 removes and this script can't show.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp(prefix="bench-redirect-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"  # never a real database
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ["RATE_LIMIT_ENABLED"] = "0"
+os.environ["CLICK_INGEST_MODE"] = "buffered"
+os.environ["CLICK_DEDUPE_ENABLED"] = "0"
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from API import link as link_api  # noqa: E402
+from core.models import Base, Company, TrackingLink  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+from usecases.auth_use import create_link_token  # noqa: E402
+from usecases.link_cache import link_cache  # noqa: E402
+
+
+def _setup() -> str:
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        company = Company(name="Bench")
+        db.add(company)
+        db.flush()
+        token = create_link_token({"campaign_id": 1, "influencer_id": 1})
+        db.add(TrackingLink(
+            company_id=company.id,
+            token=token,
+            generated_url=f"/r/{token}",
+            landing_url="https://example.com/landing",
+            status="active",
+            click_count=0,
+        ))
+        db.commit()
+        return token
+    finally:
+        db.close()
+
+
+def _measure(client: TestClient, path: str, requests: int, before=None) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        if before:
+            before()
+        t0 = time.perf_counter()
+        response = client.get(path, headers={"user-agent": "Mozilla/5.0"}, follow_redirects=False)
+        latencies.append(time.perf_counter() - t0)
+        assert response.status_code in (200, 302), response.status_code
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "req/s": round(requests / elapsed),
+        "p50 ms": round(statistics.median(latencies) * 1000, 3),
+        "p99 ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    token = _setup()
+    app = FastAPI()
+    app.include_router(link_api.router)
+    client = TestClient(app)
+
+    # warm up imports, the connection pool and the link cache
+    _measure(client, f"/r/{token}", 50)
+
+    results = {
+        "/track/{token} (JSON)": _measure(client, f"/track/{token}", args.requests),
+        "/r/{token} cache hot": _measure(client, f"/r/{token}", args.requests),
+        "/r/{token} cache cold": _measure(client, f"/r/{token}", args.requests, before=link_cache.clear),
+    }
+    width = max(len(name) for name in results)
+    for name, row in results.items():
+        print(f"{name:<{width}}  " + "  ".join(f"{key} {value:>9}" for key, value in row.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""decode_access_token with the verified-claims cache against a full jwt.decode per call.
+
+    python -m bench.bench_token_cache [--calls 20000] [--tokens 100]
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from usecases.auth_use import create_access_token, decode_access_token, token_cache  # noqa: E402
+
+
+def _measure(tokens, calls: int, before=None) -> float:
+    """Microseconds per decode."""
+    picks = [random.choice(tokens) for _ in range(calls)]
+    started = time.perf_counter()
+    for token in picks:
+        if before:
+            before()
+        decode_access_token(token)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, default=100, help="distinct users/tokens in rotation")
+    args = parser.parse_args()
+
+    tokens = [create_access_token({"sub": f"user{i}", "role": "company"}) for i in range(args.tokens)]
+
+    uncached = _measure(tokens, args.calls, before=token_cache.clear)
+    token_cache.clear()
+    token_cache.hits = token_cache.misses = 0
+    cached = _measure(tokens, args.calls)
+
+    print(f"jwt.decode every call  {uncached:8.2f} µs/call")
+    print(f"claims cache           {cached:8.2f} µs/call  ({uncached / cached:.1f}x)")
+    print(f"cache                  {token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
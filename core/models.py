@@ -1,5 +1,6 @@
 from sqlalchemy import (
-    Column, Integer, String, DateTime, ForeignKey, Numeric, Boolean, Text, JSON, Table, Index, UniqueConstraint, Date
+    Column, Integer, String, DateTime, ForeignKey, Numeric, Boolean, Text, JSON, Table, Index, UniqueConstraint, Date,
+    LargeBinary
 )
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime
@@ -54,7 +55,8 @@ class Influencer(Base):
     source_payload_json = Column(JSON, nullable=True)      # raw MLink payload if needed
 
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # indexed: MAX(updated_at) is part of the GetReport ETag, which carries influencer names
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     active = Column(Boolean, default=True)
 
@@ -100,7 +102,9 @@ class Campaign(Base):
     mlink_id = Column(String(64), unique=True, nullable=True)
     source = Column(String(16), default='mlink')
     source_payload_json = Column(JSON, nullable=True)
-    last_synced_at = Column(DateTime, nullable=True)
+    # indexed: MLink syncs (the only place campaigns are renamed) bump it, and MAX(last_synced_at)
+    # is part of the GetReport / campaign list ETags
+    last_synced_at = Column(DateTime, nullable=True, index=True)
 
 
 class Product(Base):
@@ -137,6 +141,7 @@ class TrackingLink(Base):
     campaign = relationship("Campaign", back_populates="links", foreign_keys=[campaignId])
 
     token = Column(String(512), unique=True, index=True, nullable=False)
+    short_code = Column(String(18), unique=True, index=True, nullable=True)  # signed base62 code (usecases/short_code.py)
     generated_url = Column(String(512), nullable=False)  # your public short link (e.g., /r/{token})
     landing_url = Column(String(512), nullable=True)     # current destination; can switch to MLink later
     status = Column(String(16), default='active')
@@ -191,6 +196,17 @@ class Report(Base):
     source_payload_json = Column(JSON, nullable=True)
     last_synced_at = Column(DateTime, nullable=True)
 
+    # keyset pagination of GetReport walks (createdAt desc, id desc) within a company / influencer,
+    # or across all companies for the admin view; the (scope, id) pairs make the MAX(id) ETag
+    # watermark a single index seek
+    __table_args__ = (
+        Index('ix_reports_company_created_id', 'company_id', 'createdAt', 'id'),
+        Index('ix_reports_influencer_created_id', 'influencer_id', 'createdAt', 'id'),
+        Index('ix_reports_created_id', 'createdAt', 'id'),
+        Index('ix_reports_company_id', 'company_id', 'id'),
+        Index('ix_reports_influencer_id', 'influencer_id', 'id'),
+    )
+
 
 class Company(Base):
     __tablename__ = 'companies'
@@ -229,6 +245,13 @@ class ActivityLog(Base):
 
     company = relationship("Company")
 
+    # per-company feed, newest first, keyset-paginated on (timestamp, id); (company_id, id)
+    # serves the MAX(id) ETag watermark
+    __table_args__ = (
+        Index('ix_activity_log_company_ts_id', 'company_id', 'timestamp', 'id'),
+        Index('ix_activity_log_company_id', 'company_id', 'id'),
+    )
+
 
 # Daily rollup model instead of per-click events
 class LinkClicksDaily(Base):
@@ -238,9 +261,68 @@ class LinkClicksDaily(Base):
     link_id = Column(Integer, ForeignKey('tracking_links.id'), nullable=False, index=True)
     date = Column(Date, nullable=False, index=True)
     clicks = Column(Integer, default=0, nullable=False)
-    unique_clicks = Column(Integer, default=0, nullable=False)  # optional if you implement uniqueness
+    unique_clicks = Column(Integer, default=0, nullable=False)  # HyperLogLog estimate of unique_sketch
+    unique_sketch = Column(LargeBinary, nullable=True)          # fixed-size HLL registers (usecases/hll.py)
 
     __table_args__ = (
         UniqueConstraint('link_id', 'date', name='uq_link_date'),
         Index('ix_linkclicksdaily_linkid_date', 'link_id', 'date'),
     )
+
+
+# Finer / coarser tiers around LinkClicksDaily (see usecases/click_rollups.py):
+# hourly rows are kept for recent days, daily rows are folded into monthly ones after a few months.
+class LinkClicksHourly(Base):
+    __tablename__ = 'link_clicks_hourly'
+
+    id = Column(Integer, primary_key=True)
+    link_id = Column(Integer, ForeignKey('tracking_links.id'), nullable=False)
+    hour = Column(DateTime, nullable=False, index=True)  # truncated to the hour
+    clicks = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('link_id', 'hour', name='uq_link_hour'),
+    )
+
+
+class LinkClicksMonthly(Base):
+    __tablename__ = 'link_clicks_monthly'
+
+    id = Column(Integer, primary_key=True)
+    link_id = Column(Integer, ForeignKey('tracking_links.id'), nullable=False)
+    month = Column(Date, nullable=False, index=True)  # first day of the month
+    clicks = Column(Integer, default=0, nullable=False)
+    unique_clicks = Column(Integer, default=0, nullable=False)
+    unique_sketch = Column(LargeBinary, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint('link_id', 'month', name='uq_link_month'),
+    )
+
+
+# Pre-aggregated reports per (company, campaign, influencer, day), maintained together with every
+# Report insert (see usecases/report_rollup.py). Missing company/influencer ids are stored as 0 so
+# the unique key also matches them (NULLs never conflict), hence no foreign keys here.
+class ReportRollup(Base):
+    __tablename__ = 'report_rollup'
+
+    id = Column(Integer, primary_key=True)
+    company_id = Column(Integer, nullable=False, default=0)
+    campaignId = Column(Integer, nullable=False)
+    influencer_id = Column(Integer, nullable=False, default=0)
+    day = Column(Date, nullable=False)  # UTC date of Report.createdAt
+
+    reports = Column(Integer, default=0, nullable=False)
+    totalClicks = Column(Integer, default=0, nullable=False)
+    totalSales = Column(Integer, default=0, nullable=False)
+    brandCommissionAmount = Column(Numeric(14, 2), default=0, nullable=False)
+    influencerCommissionAmount = Column(Numeric(14, 2), default=0, nullable=False)
+    mimedaCommissionAmount = Column(Numeric(14, 2), default=0, nullable=False)
+    agencyCommissionAmount = Column(Numeric(14, 2), default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('company_id', 'campaignId', 'influencer_id', 'day', name='uq_report_rollup_key'),
+        Index('ix_report_rollup_company_day', 'company_id', 'day'),
+        # ids never repeat after a rebuild, so MAX(id) tells cached summaries that the rollup was rewritten
+        {'sqlite_autoincrement': True},
+    )
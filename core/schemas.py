@@ -226,6 +226,7 @@ class ReportListResponse(BaseModel):
 
     activeInfluencers: Optional[int]
     totalInfluencerCommission: Optional[Decimal]
+    nextCursor: Optional[str] = None
 
 class ReportFilter(BaseModel):
     influencerID: Optional[str] = None
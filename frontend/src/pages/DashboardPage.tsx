@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { TrendingUp, Users, MousePointer, DollarSign, Link2, RefreshCw } from 'lucide-react';
 import { PerformanceChart } from '../components/PerformanceChart';
 import { StatsCard } from '../components/StatsCard';
-import { getDashboardActivity, getDashboardSummary, DashboardSummaryResponse, Report, getReports, ActivityOut } from '../services/api';
+import { getDashboardActivity, getDashboardSummary, DashboardSummaryResponse, getReportTimeseries, ActivityOut, streamDashboard, DashboardDelta } from '../services/api';
 import type { ChartPoint } from '../components/PerformanceChart';
 import { useLang, translations } from '../contexts/LangContext';
 
@@ -25,37 +25,17 @@ export function DashboardPage({ onAddToast }: DashboardPageProps) {
   const { lang } = useLang();
   const t = (key: string) => translations[lang][key] || key;
 
-  // Calculate dashboard stats from reports
-  const calculateStatsFromReports = (reports: any[]) => {
-    const activeCampaigns = new Set<number>();
-    let totalClicks = 0;
-    let totalSales = 0;
-    let totalCommission = 0;
-    for (const r of reports) {
-      if (r.campaignID) activeCampaigns.add(Number(r.campaignID));
-      totalClicks += Number(r.totalClicks) || 0;
-      totalSales += Number(r.totalSales) || 0;
-      totalCommission += Number(r.brandCommissionCommisionAmount ?? 0) || 0;
-    }
-    return {
-      activeCampaigns: activeCampaigns.size,
-      totalClicks,
-      totalSales,
-      totalCommission,
-    };
-  };
+  // Stats cards come from the same local report rollup as the chart, so both always agree
+  const toStats = (summary: DashboardSummaryResponse) => ({
+    activeCampaigns: Number(summary.activeCampaigns) || 0,
+    totalClicks: Number(summary.totalClicks) || 0,
+    totalSales: Number(summary.totalSales) || 0,       // Decimal arrives as a string
+    totalCommission: Number(summary.totalCommission) || 0,
+  });
 
-  // Fetch dashboard data from getReports only
   const fetchDashboardData = async () => {
     try {
-      const reportsRes = await getReports();
-      let reports: any[] = [];
-      if (Array.isArray(reportsRes.data)) {
-        reports = reportsRes.data;
-      } else if (reportsRes.data && Array.isArray(reportsRes.data.data)) {
-        reports = reportsRes.data.data;
-      }
-      setStats(calculateStatsFromReports(reports));
+      setStats(toStats(await getDashboardSummary()));
       try {
         const activity = await getDashboardActivity();
         setRecentActivity(activity);
@@ -67,7 +47,7 @@ export function DashboardPage({ onAddToast }: DashboardPageProps) {
     }
   };
 
-  // Build chart for last 7 days only, mapping correctly from response
+  // Build chart for the last 7 days from the server-side, zero-filled timeseries
   const buildChartForRange = async () => {
     const end = new Date();
     const days = 7;
@@ -80,40 +60,19 @@ export function DashboardPage({ onAddToast }: DashboardPageProps) {
       String(d.getMonth() + 1).padStart(2, '0') + '.' +
       d.getFullYear();
 
-    const reportsRes = await getReports(undefined, fmt(start), fmt(end));
-    let rows: any[] = [];
-    if (Array.isArray(reportsRes.data)) {
-      rows = reportsRes.data;
-    } else if (reportsRes.data && Array.isArray(reportsRes.data.data)) {
-      rows = reportsRes.data.data;
-    }
-
-    // Group by day (using endDate in DD.MM.YYYY format)
-    const byDay = new Map<string, { sales: number; clicks: number }>();
-    for (const r of rows) {
-      const key = r.endDate;
-      const prev = byDay.get(key) || { sales: 0, clicks: 0 };
-      byDay.set(key, {
-        sales: prev.sales + (Number(r.totalSales) || 0),
-        clicks: prev.clicks + (Number(r.totalClicks) || 0),
-      });
-    }
+    const points = await getReportTimeseries({ bucket: 'day', StartDate: fmt(start), EndDate: fmt(end) });
 
-    // Build last 7 days labels and values
-    const result: ChartPoint[] = [];
-    for (let i = days - 1; i >= 0; i--) {
-      const d = new Date(end);
-      d.setDate(end.getDate() - i);
-      const key = fmt(d); // DD.MM.YYYY
-      const w = ['Sun','Mon','Tue','Wed','Thu','Fri','Sat'][d.getDay()];
-      const v = byDay.get(key) || { sales: 0, clicks: 0 };
-      result.push({ day: `${w}`, sales: v.sales, clicks: v.clicks });
-    }
+    // one point per day already; only label it with the weekday
+    const result: ChartPoint[] = points.map((p) => {
+      const [y, m, d] = p.period.split('-').map(Number);
+      const w = ['Sun','Mon','Tue','Wed','Thu','Fri','Sat'][new Date(y, m - 1, d).getDay()];
+      return { day: w, sales: Number(p.totalSales) || 0, clicks: Number(p.totalClicks) || 0 };
+    });
 
     setChartData(result);
 
-    const totalSalesSum = rows.reduce((sum, r) => sum + (Number(r.totalSales) || 0), 0);
-    const totalClicksSum = rows.reduce((sum, r) => sum + (Number(r.totalClicks) || 0), 0);
+    const totalSalesSum = result.reduce((sum, p) => sum + p.sales, 0);
+    const totalClicksSum = result.reduce((sum, p) => sum + p.clicks, 0);
     const conversionRate = totalClicksSum
       ? Number(((totalSalesSum / totalClicksSum) * 100).toFixed(1))
       : 0;
@@ -130,6 +89,28 @@ export function DashboardPage({ onAddToast }: DashboardPageProps) {
     loadData();
   }, []);
 
+  // Live updates: fold each delta from /dashboard/stream into the cards and the activity list
+  useEffect(() => {
+    const applyDelta = (delta: DashboardDelta) => {
+      const { reports } = delta;
+      if (reports.count) {
+        setStats((prev) => prev && {
+          ...prev,
+          totalClicks: prev.totalClicks + (Number(reports.totalClicks) || 0),
+          totalSales: prev.totalSales + (Number(reports.totalSales) || 0),
+          totalCommission: prev.totalCommission + (Number(reports.brandCommissionAmount) || 0),
+        });
+      }
+      if (delta.activity.length) {
+        setRecentActivity((prev) => [...delta.activity].reverse().concat(prev).slice(0, 10));
+      }
+    };
+
+    const controller = new AbortController();
+    streamDashboard(applyDelta, controller.signal);
+    return () => controller.abort();
+  }, []);
+
   const handleRefresh = async () => {
     setIsRefreshing(true);
     await Promise.all([
@@ -177,6 +177,87 @@ export const getDashboardActivity = async (): Promise<ActivityOut[]> => {
   return res.data; // NOTE: this endpoint returns a raw list (no wrapper)
 };
 
+export interface DashboardDelta {
+  companyId: number | null;
+  clicks: Record<string, number>;   // link id -> clicks since the previous delta
+  clickTotal: number;
+  reports: {
+    count: number;
+    totalClicks: number;
+    totalSales: number | string;            // Decimal may arrive as a string
+    brandCommissionAmount: number | string;
+  };
+  activity: ActivityOut[];          // oldest first
+}
+
+// Follows GET /dashboard/stream (server-sent events) until `signal` aborts.
+// EventSource can't send the Bearer header, so the stream is read with fetch instead;
+// dropped connections are retried after the server's `retry:` delay.
+export const streamDashboard = async (
+  onDelta: (delta: DashboardDelta) => void,
+  signal: AbortSignal,
+): Promise<void> => {
+  let retryMs = 5000;
+  while (!signal.aborted) {
+    try {
+      const token = localStorage.getItem('token');
+      const res = await fetch(`${API_BASE_URL}/dashboard/stream`, {
+        headers: token ? { Authorization: `Bearer ${token}` } : {},
+        signal,
+      });
+      if (res.status === 401 || res.status === 403) return; // retrying won't help
+      if (!res.ok || !res.body) throw new Error(`stream failed: ${res.status}`);
+
+      const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+      let buffer = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+        // events are separated by a blank line; the last chunk may be incomplete
+        const events = buffer.split('\n\n');
+        buffer = events.pop() ?? '';
+        for (const raw of events) {
+          let event = 'message';
+          let data = '';
+          for (const line of raw.split('\n')) {
+            if (line.startsWith('event:')) event = line.slice(6).trim();
+            else if (line.startsWith('data:')) data += line.slice(5).trim();
+            else if (line.startsWith('retry:')) retryMs = Number(line.slice(6)) || retryMs;
+          }
+          if (event === 'delta' && data) onDelta(JSON.parse(data));
+        }
+      }
+    } catch {
+      if (signal.aborted) return;
+    }
+    await new Promise((resolve) => setTimeout(resolve, retryMs));
+  }
+};
+
+export interface TimeseriesPoint {
+  period: string; // bucket start, YYYY-MM-DD
+  reports: number;
+  totalClicks: number;
+  totalSales: number;
+  brandCommissionAmount: number;
+  influencerCommissionAmount: number;
+  mimedaCommissionAmount: number;
+  agencyCommissionAmount: number;
+  linkClicks: number;
+}
+
+export const getReportTimeseries = async (params?: {
+  bucket?: 'day' | 'week' | 'month';
+  InfluencerID?: string;
+  StartDate?: string; // DD.MM.YYYY
+  EndDate?: string;   // DD.MM.YYYY
+  campaignID?: number;
+}): Promise<TimeseriesPoint[]> => {
+  const { data } = await apiClient.get('/reports/timeseries', { params });
+  return data.data.points; // zero-filled, one point per bucket
+};
+
 export const mlinkGetCampaigns = async (params?: {
   Name?: string;
   StartDate?: string; 
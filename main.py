@@ -3,6 +3,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from API import user, admin, auth, reports, dashboard, routes, link
 from database import engine
 from core.models import Base
+from usecases.click_buffer import click_buffer, CLICK_INGEST_MODE
+from usecases.click_rollups import rollup_compactor
+from usecases.click_journal import click_journal
+from usecases.auth_use import shutdown_password_pool
 
 app = FastAPI()
 
@@ -22,3 +26,24 @@ app.include_router(reports.router)
 app.include_router(dashboard.router)
 app.include_router(routes.router)
 app.include_router(link.router)
+
+
+@app.on_event("startup")
+def start_background_jobs():
+    if CLICK_INGEST_MODE == "buffered":
+        click_buffer.start()
+    if click_journal:
+        # registers this worker with the journal, so rebuilds refuse to run while it is up
+        click_journal.open()
+    rollup_compactor.start()
+
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    # flush whatever is still buffered before the worker exits
+    rollup_compactor.stop()
+    if CLICK_INGEST_MODE == "buffered":
+        click_buffer.stop()
+    if click_journal:
+        click_journal.close()
+    shutdown_password_pool()
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# database.py builds its engine at import time; point it somewhere harmless before any app import
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_default.db")
+
+from core.models import Base, Company, TrackingLink  # noqa: E402
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """A file-backed SQLite database (so threads really use separate connections)."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'clicks.db'}",
+        connect_args={"timeout": 30, "check_same_thread": False},
+    )
+
+    @event.listens_for(engine, "connect")
+    def _wal(dbapi_connection, _):
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    engine.dispose()
+
+
+@pytest.fixture
+def link_id(session_factory):
+    db = session_factory()
+    try:
+        company = Company(name="Acme")
+        db.add(company)
+        db.flush()
+        link = TrackingLink(
+            company_id=company.id,
+            token="t" * 40,
+            generated_url="http://localhost/track?token=x",
+            status="active",
+            click_count=0,
+        )
+        db.add(link)
+        db.commit()
+        return link.id
+    finally:
+        db.close()
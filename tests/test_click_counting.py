@@ -0,0 +1,100 @@
+"""Concurrent click ingestion must neither lose nor double-count clicks."""
+import threading
+
+from API import link as link_module
+from core.models import LinkClicksDaily, LinkClicksHourly, TrackingLink
+from usecases import click_buffer as click_buffer_module
+from usecases.click_buffer import ClickBuffer, hour_bucket, write_click_deltas
+from usecases.hll import HyperLogLog
+
+THREADS = 16
+CLICKS_PER_THREAD = 250
+
+
+def _run_threads(target):
+    errors = []
+
+    def guarded(i):
+        try:
+            target(i)
+        except Exception as e:  # surfaced in the main thread
+            errors.append(e)
+
+    threads = [threading.Thread(target=guarded, args=(i,)) for i in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors, errors
+
+
+def _counts(session_factory, link_id):
+    db = session_factory()
+    try:
+        click_count = db.query(TrackingLink.click_count).filter(TrackingLink.id == link_id).scalar()
+        daily = db.query(LinkClicksDaily.clicks).filter(LinkClicksDaily.link_id == link_id).all()
+        hourly = db.query(LinkClicksHourly.clicks).filter(LinkClicksHourly.link_id == link_id).all()
+        return click_count, [n for (n,) in daily], [n for (n,) in hourly]
+    finally:
+        db.close()
+
+
+def test_write_click_deltas_is_exact_under_concurrency(session_factory, link_id):
+    hour = hour_bucket()
+
+    def writer(i):
+        for j in range(CLICKS_PER_THREAD):
+            db = session_factory()
+            try:
+                sketch = HyperLogLog()
+                sketch.add_hash(i * CLICKS_PER_THREAD + j)
+                write_click_deltas(db, {(link_id, hour): 1}, {(link_id, hour.date()): sketch})
+                db.commit()
+            finally:
+                db.close()
+
+    _run_threads(writer)
+
+    total = THREADS * CLICKS_PER_THREAD
+    click_count, daily, hourly = _counts(session_factory, link_id)
+    assert click_count == total
+    assert daily == [total]
+    assert hourly == [total]
+
+
+def test_count_click_sync_mode_is_exact_under_concurrency(session_factory, link_id, monkeypatch):
+    monkeypatch.setattr(link_module, "CLICK_INGEST_MODE", "sync")
+    monkeypatch.setattr(link_module, "CLICK_DEDUPE_ENABLED", False)
+    monkeypatch.setattr(link_module, "click_journal", None)
+    monkeypatch.setattr(link_module, "SessionLocal", session_factory)
+
+    def clicker(i):
+        for j in range(CLICKS_PER_THREAD):
+            link_module._count_click(link_id, i * CLICKS_PER_THREAD + j, "Mozilla/5.0", None)
+
+    _run_threads(clicker)
+
+    total = THREADS * CLICKS_PER_THREAD
+    click_count, daily, _ = _counts(session_factory, link_id)
+    assert click_count == total
+    assert sum(daily) == total
+
+
+def test_click_buffer_flush_is_exact_under_concurrency(session_factory, link_id, monkeypatch):
+    monkeypatch.setattr(click_buffer_module, "SessionLocal", session_factory)
+    buffer = ClickBuffer(flush_interval=60, max_size=10 ** 9)
+
+    def recorder(i):
+        for j in range(CLICKS_PER_THREAD):
+            buffer.record(link_id, fingerprint=i * CLICKS_PER_THREAD + j)
+            if j % 10 == 0:
+                buffer.flush()  # flushes race the recorders
+
+    _run_threads(recorder)
+    buffer.flush()
+
+    total = THREADS * CLICKS_PER_THREAD
+    click_count, daily, _ = _counts(session_factory, link_id)
+    assert buffer.pending() == 0
+    assert click_count == total
+    assert sum(daily) == total
@@ -0,0 +1,105 @@
+import os
+import time
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from dotenv import load_dotenv
+
+from core.models import ActivityLog
+from usecases.live_hub import live_hub
+
+load_dotenv()
+
+ACTIVITY_RING_SIZE = int(os.getenv("ACTIVITY_RING_SIZE", "50"))  # recent entries kept per company
+ACTIVITY_RING_COMPANIES = int(os.getenv("ACTIVITY_RING_COMPANIES", "1000"))
+# entries committed by other worker processes show up once the ring is this old and gets reseeded
+ACTIVITY_RING_TTL = float(os.getenv("ACTIVITY_RING_TTL", "5"))  # seconds
+
+
+class ActivityEntry(NamedTuple):
+    id: int
+    company_id: int
+    type: str
+    label: str
+    timestamp: Optional[datetime]
+
+
+def _sort_key(entry: ActivityEntry):
+    return (entry.timestamp or datetime.min, entry.id)
+
+
+class ActivityRing:
+    """Newest ActivityLog entries per company (None = all companies), filled on write.
+
+    Freshness is tracked in process: entries committed by this worker are appended by the
+    after_commit hook below, and a ring older than `ttl` is no longer served, so entries
+    written by other worker processes are picked up by the next reseed. Serving the ring
+    costs no query at all.
+    """
+
+    def __init__(self, size: int, max_scopes: int, ttl: float):
+        self.size = size
+        self.max_scopes = max_scopes
+        self.ttl = ttl
+        self._rings: Dict[Optional[int], list] = {}  # scope -> [deque of entries, seeded at]
+        self._lock = threading.Lock()
+
+    def seed(self, scope: Optional[int], entries: List[ActivityEntry]) -> None:
+        with self._lock:
+            if scope not in self._rings and len(self._rings) >= self.max_scopes:
+                self._rings.pop(next(iter(self._rings)))
+            self._rings[scope] = [deque(sorted(entries, key=_sort_key), maxlen=self.size), time.monotonic()]
+
+    def add(self, entry: ActivityEntry) -> None:
+        with self._lock:
+            # only extend rings that were seeded; an unseeded ring would look complete while it isn't
+            for scope in (entry.company_id, None):
+                ring = self._rings.get(scope)
+                if ring is not None:
+                    ring[0].append(entry)
+
+    def latest(self, scope: Optional[int], limit: int) -> Optional[Tuple[List[ActivityEntry], Optional[int]]]:
+        """(newest `limit` entries, newest id), or None when the ring is unseeded or older than `ttl`."""
+        if limit > self.size:
+            return None
+        with self._lock:
+            ring = self._rings.get(scope)
+            if ring is None or time.monotonic() - ring[1] > self.ttl:
+                return None
+            entries = sorted(ring[0], key=_sort_key, reverse=True)
+        return entries[:limit], max((e.id for e in entries), default=None)
+
+
+activity_ring = ActivityRing(ACTIVITY_RING_SIZE, ACTIVITY_RING_COMPANIES, ACTIVITY_RING_TTL)
+
+
+# ActivityLog rows reach the ring and the live hub once their transaction commits
+
+@event.listens_for(ActivityLog, "after_insert")
+def _stage_activity(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        # copied now: after_commit can't load expired attributes
+        session.info.setdefault("new_activity", []).append(
+            ActivityEntry(target.id, target.company_id, target.type, target.label, target.timestamp)
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _announce_activity(session):
+    for entry in session.info.pop("new_activity", ()):
+        activity_ring.add(entry)
+        live_hub.publish_activity(entry.company_id, {
+            "type": entry.type,
+            "label": entry.label,
+            "timestamp": entry.timestamp.isoformat() if entry.timestamp else None,
+        })
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_activity(session):
+    session.info.pop("new_activity", None)
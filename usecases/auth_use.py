@@ -5,8 +5,14 @@ from typing import Optional
 from datetime import timedelta
 from dotenv import load_dotenv
 import os
+import time
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from usecases.cache import TTLCache
 
 load_dotenv()
 
@@ -15,6 +21,13 @@ LINK_SECRET_KEY = os.getenv("LINK_SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60*12
 LINK_TOKEN_EXPIRE_MINUTES = 60*24*30
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", "2"))
+PASSWORD_POOL_QUEUE = int(os.getenv("PASSWORD_POOL_QUEUE", "16"))  # queued hash jobs before we answer 503
+
+# sha256(token) -> verified claims; each entry expires at the token's own `exp`
+token_cache = TTLCache(TOKEN_CACHE_SIZE, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
 
 def create_link_token(data: dict) -> str:
     to_encode = data.copy()
@@ -29,19 +42,88 @@ def create_access_token(data: dict) -> str:
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def decode_access_token(token: str) -> dict:
+    key = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         raise HTTPException(status_code=401)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    exp = payload.get("exp")
+    if exp is not None:
+        remaining = float(exp) - time.time()
+        if remaining > 0:
+            token_cache.set(key, dict(payload), ttl=remaining)
+    return payload
 
-def hash_password(password: str) -> str:
+# hashes below BCRYPT_ROUNDS are flagged by needs_update() and rehashed on the next login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
+
+# bcrypt runs in a small dedicated thread pool: bcrypt releases the GIL while hashing, so the
+# event loop keeps running, and WORKERS caps how many cores logins can take. A process pool
+# bought nothing on top of that but spawn, import and pickling overhead.
+# At most WORKERS + QUEUE jobs are in flight; beyond that callers get a 503 right away.
+_password_pool = None
+_password_pool_lock = threading.Lock()
+_password_slots = threading.BoundedSemaphore(PASSWORD_POOL_WORKERS + PASSWORD_POOL_QUEUE)
+
+
+def _get_password_pool() -> ThreadPoolExecutor:
+    global _password_pool
+    if _password_pool is None:
+        with _password_pool_lock:
+            if _password_pool is None:
+                _password_pool = ThreadPoolExecutor(
+                    max_workers=PASSWORD_POOL_WORKERS,
+                    thread_name_prefix="password",
+                )
+    return _password_pool
+
+
+def _hash(password: str) -> str:
     return pwd_context.hash(password)
 
+
+def _verify_and_update(plain_password: str, hashed_password: str):
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _submit_password_job(fn, *args):
+    if not _password_slots.acquire(blocking=False):
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+    try:
+        future = _get_password_pool().submit(fn, *args)
+    except Exception:
+        _password_slots.release()
+        raise
+    future.add_done_callback(lambda _: _password_slots.release())
+    return future
+
+
+def hash_password(password: str) -> str:
+    return _submit_password_job(_hash, password).result()
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    verified, _ = _submit_password_job(_verify_and_update, plain_password, hashed_password).result()
+    return verified
+
+async def verify_and_update_password(plain_password: str, hashed_password: str):
+    """Returns (verified, new_hash); new_hash is set when the stored hash should be upgraded."""
+    return await asyncio.wrap_future(_submit_password_job(_verify_and_update, plain_password, hashed_password))
+
+def shutdown_password_pool() -> None:
+    global _password_pool
+    if _password_pool is not None:
+        _password_pool.shutdown(wait=False, cancel_futures=True)
+        _password_pool = None
 
 security = HTTPBearer()
 
@@ -0,0 +1,322 @@
+import os
+import glob
+import json
+import time
+import fcntl
+import logging
+import threading
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Tuple, Optional
+
+from sqlalchemy import bindparam
+from dotenv import load_dotenv
+
+from database import SessionLocal
+from core.models import TrackingLink, LinkClicksDaily, LinkClicksHourly
+from usecases.db_utils import upsert_increment
+from usecases.hll import HyperLogLog
+from usecases.shared_counters import shared_counters
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# 'buffered' -> clicks are aggregated in memory and flushed in bulk
+# 'sync'     -> every click is written to the DB inside the request
+CLICK_INGEST_MODE = os.getenv("CLICK_INGEST_MODE", "buffered")
+CLICK_FLUSH_INTERVAL = float(os.getenv("CLICK_FLUSH_INTERVAL", "5"))   # seconds
+CLICK_BUFFER_MAX = int(os.getenv("CLICK_BUFFER_MAX", "1000"))          # clicks before an early flush
+# Pending clicks are spooled next to this path (one `<path>.<pid>.<ns>` file per stopping worker)
+# if the DB is unreachable at shutdown, and replayed by whichever worker starts next
+CLICK_SPOOL_PATH = os.getenv("CLICK_SPOOL_PATH", "click_spool.json")
+
+ClickKey = Tuple[int, datetime]   # (link_id, hour bucket)
+SketchKey = Tuple[int, date]      # (link_id, day)
+
+
+def hour_bucket(at: Optional[datetime] = None) -> datetime:
+    return (at or datetime.now()).replace(minute=0, second=0, microsecond=0)
+
+
+def write_click_deltas(
+    db,
+    deltas: Dict[ClickKey, int],
+    sketches: Optional[Dict[SketchKey, HyperLogLog]] = None,
+    bump_link_counts: bool = True,
+) -> None:
+    """Applies aggregated {(link_id, hour): clicks} deltas atomically.
+
+    click_count is bumped with `click_count = click_count + n` and the hourly and daily
+    rollups are upserted with INSERT ... ON CONFLICT DO UPDATE, so parallel writers never
+    lose clicks. Unique-visitor sketches, if given, are merged into the daily rows afterwards.
+    `bump_link_counts=False` leaves click_count alone (used when rebuilding from the journal).
+
+    Every batch touches rows in key order, so two flushers (or a flusher and a rebuild) lock
+    overlapping rows in the same order and can't deadlock on PostgreSQL.
+    """
+    links = TrackingLink.__table__
+
+    per_link: Dict[int, int] = defaultdict(int)
+    per_day: Dict[SketchKey, int] = defaultdict(int)
+    for (link_id, hour), n in deltas.items():
+        per_link[link_id] += n
+        per_day[(link_id, hour.date())] += n
+    # a worker may hold sketches for days whose clicks another worker flushes; make sure the rows exist
+    for key in sketches or ():
+        per_day.setdefault(key, 0)
+
+    if bump_link_counts and per_link:
+        db.execute(
+            links.update()
+            .where(links.c.id == bindparam("b_link_id"))
+            .values(click_count=links.c.click_count + bindparam("b_n")),
+            [{"b_link_id": link_id, "b_n": n} for link_id, n in sorted(per_link.items())],
+        )
+
+    upsert_increment(
+        db,
+        LinkClicksHourly.__table__,
+        [{"link_id": link_id, "hour": hour, "clicks": n} for (link_id, hour), n in sorted(deltas.items())],
+        index_elements=["link_id", "hour"],
+        increment=["clicks"],
+    )
+
+    upsert_increment(
+        db,
+        LinkClicksDaily.__table__,
+        [
+            {"link_id": link_id, "date": day, "clicks": n, "unique_clicks": 1}
+            for (link_id, day), n in sorted(per_day.items())
+        ],
+        index_elements=["link_id", "date"],
+        increment=["clicks"],
+    )
+
+    if sketches:
+        merge_unique_sketches(db, sketches)
+
+
+def merge_unique_sketches(db, sketches: Dict[SketchKey, HyperLogLog]) -> None:
+    """Unions buffered HLL sketches into the stored daily sketches and refreshes unique_clicks."""
+    daily = LinkClicksDaily.__table__
+    rows = (
+        db.query(LinkClicksDaily.id, LinkClicksDaily.link_id, LinkClicksDaily.date, LinkClicksDaily.unique_sketch)
+        .filter(
+            LinkClicksDaily.link_id.in_({link_id for link_id, _ in sketches}),
+            LinkClicksDaily.date.in_({day for _, day in sketches}),
+        )
+        .order_by(LinkClicksDaily.link_id, LinkClicksDaily.date)
+        .with_for_update()
+        .all()
+    )
+
+    updates = []
+    for row_id, link_id, day, blob in rows:
+        sketch = sketches.get((link_id, day))
+        if sketch is None:
+            continue
+        if blob:
+            sketch = HyperLogLog(blob).merge(sketch)
+        updates.append({"b_id": row_id, "b_sketch": sketch.to_bytes(), "b_unique": sketch.count()})
+
+    if updates:
+        db.execute(
+            daily.update()
+            .where(daily.c.id == bindparam("b_id"))
+            .values(unique_sketch=bindparam("b_sketch"), unique_clicks=bindparam("b_unique")),
+            updates,
+        )
+
+
+class ClickBuffer:
+    """In-process write-behind buffer for /track clicks.
+
+    Clicks are counted per (link_id, hour) and flushed as aggregated deltas either every
+    `flush_interval` seconds or as soon as `max_size` clicks are pending, whichever comes first.
+    Only one flush runs at a time, so the flusher never holds more than one pooled connection.
+
+    With `shared` counters (multi-worker deployments) click counts go to shared memory instead
+    and only the elected worker flushes them; unique-visitor sketches stay per worker.
+    """
+
+    def __init__(self, flush_interval: float, max_size: int, spool_path: Optional[str] = None, shared=None):
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.spool_path = spool_path
+        self.shared = shared
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[ClickKey, int] = defaultdict(int)
+        self._sketches: Dict[SketchKey, HyperLogLog] = {}
+        self._pending_count = 0
+
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, link_id: int, at: Optional[datetime] = None, n: int = 1, fingerprint: Optional[int] = None) -> None:
+        hour = hour_bucket(at)
+        in_shared = at is None and self.shared is not None and self.shared.increment(link_id, n)
+        with self._lock:
+            if not in_shared:
+                self._pending[(link_id, hour)] += n
+                self._pending_count += n
+            if fingerprint is not None:
+                day_key = (link_id, hour.date())
+                sketch = self._sketches.get(day_key)
+                if sketch is None:
+                    sketch = self._sketches[day_key] = HyperLogLog()
+                sketch.add_hash(fingerprint)
+            full = self._pending_count >= self.max_size
+        if full:
+            self._wake.set()
+
+    def pending(self) -> int:
+        return self._pending_count
+
+    def _take(self):
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+            sketches, self._sketches = self._sketches, {}
+            self._pending_count = 0
+        return pending, sketches
+
+    def _restore(self, deltas: Dict[ClickKey, int], sketches: Dict[SketchKey, HyperLogLog]) -> None:
+        with self._lock:
+            for key, n in deltas.items():
+                self._pending[key] += n
+                self._pending_count += n
+            for key, sketch in sketches.items():
+                current = self._sketches.get(key)
+                self._sketches[key] = current.merge(sketch) if current else sketch
+
+    def flush(self) -> int:
+        """Writes pending clicks to the DB. On failure the deltas are put back for the next round."""
+        with self._flush_lock:
+            deltas, sketches = self._take()
+
+            combined = dict(deltas)
+            shared_deltas: Dict[int, int] = {}
+            if self.shared is not None and self.shared.is_leader():
+                # shared counts carry no timestamp; they are attributed to the hour of the flush
+                shared_deltas = self.shared.collect()
+                hour = hour_bucket()
+                for link_id, n in shared_deltas.items():
+                    combined[(link_id, hour)] = combined.get((link_id, hour), 0) + n
+
+            if not combined and not sketches:
+                return 0
+
+            db = SessionLocal()
+            try:
+                write_click_deltas(db, combined, sketches)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Click flush failed, keeping {sum(combined.values())} click(s) buffered: {e}")
+                # shared counts stay unflushed in shared memory and are collected again next round
+                self._restore(deltas, sketches)
+                return 0
+            finally:
+                db.close()
+            if shared_deltas:
+                self.shared.mark_flushed(shared_deltas)
+            return sum(combined.values())
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        if self.shared is not None:
+            self.shared.attach()
+        self._load_spool()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="click-buffer-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+        self._write_spool()
+        if self.shared is not None:
+            # anything still in shared memory is flushed by the next elected worker
+            self.shared.detach()
+
+    # --- spool (survives restarts when the final flush can't reach the DB) ---
+    # Each stopping worker writes its own file via an atomic rename, so workers never overwrite
+    # one another; a starting worker claims every spool file under an flock so each is replayed once.
+
+    def _write_spool(self) -> None:
+        deltas, sketches = self._take()
+        if not (deltas or sketches) or not self.spool_path:
+            return
+        spool = {
+            "clicks": [[link_id, hour.isoformat(), n] for (link_id, hour), n in deltas.items()],
+            "sketches": [[link_id, day.isoformat(), sk.to_bytes().hex()] for (link_id, day), sk in sketches.items()],
+        }
+        path = f"{self.spool_path}.{os.getpid()}.{time.time_ns()}"
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(spool, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Could not spool {sum(deltas.values())} unflushed click(s) to {path}: {e}")
+            return
+        logger.warning(f"Spooled {sum(deltas.values())} unflushed click(s) to {path}")
+
+    def _spool_files(self):
+        # the bare path is what single-file spools were written to before
+        paths = glob.glob(glob.escape(self.spool_path) + ".*")
+        if os.path.exists(self.spool_path):
+            paths.append(self.spool_path)
+        return sorted(p for p in paths if not p.endswith((".tmp", ".lock")))
+
+    def _load_spool(self) -> None:
+        if not self.spool_path:
+            return
+        try:
+            lock = open(f"{self.spool_path}.lock", "a")
+        except OSError as e:
+            logger.error(f"Could not open click spool lock for {self.spool_path}: {e}")
+            return
+        with lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                for path in self._spool_files():
+                    self._load_spool_file(path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load_spool_file(self, path: str) -> None:
+        try:
+            with open(path) as f:
+                spool = json.load(f)
+            os.remove(path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read click spool {path}: {e}")
+            return
+        deltas: Dict[ClickKey, int] = {
+            (int(link_id), datetime.fromisoformat(hour)): int(n) for link_id, hour, n in spool.get("clicks", [])
+        }
+        sketches: Dict[SketchKey, HyperLogLog] = {
+            (int(link_id), date.fromisoformat(day)): HyperLogLog(bytes.fromhex(blob))
+            for link_id, day, blob in spool.get("sketches", [])
+        }
+        self._restore(deltas, sketches)
+
+
+click_buffer = ClickBuffer(CLICK_FLUSH_INTERVAL, CLICK_BUFFER_MAX, CLICK_SPOOL_PATH, shared_counters)
@@ -0,0 +1,149 @@
+import os
+import re
+import math
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# A repeat click from the same client on the same link within this many seconds is a duplicate
+CLICK_DEDUPE_WINDOW = float(os.getenv("CLICK_DEDUPE_WINDOW", "30"))
+# Distinct (link, client) pairs expected per window; sizes the filter together with the FP rate
+CLICK_DEDUPE_CAPACITY = int(os.getenv("CLICK_DEDUPE_CAPACITY", "100000"))
+CLICK_DEDUPE_FP_RATE = float(os.getenv("CLICK_DEDUPE_FP_RATE", "0.001"))
+# 'drop'  -> duplicates/bots are discarded, only global totals are kept
+# 'count' -> duplicates/bots are also tallied per link (in memory, never written per hit)
+CLICK_DEDUPE_MODE = os.getenv("CLICK_DEDUPE_MODE", "drop")
+# 'count' mode keeps tallies for at most this many links; the least recently flagged ones are evicted
+CLICK_DEDUPE_PER_LINK_MAX = int(os.getenv("CLICK_DEDUPE_PER_LINK_MAX", "10000"))
+CLICK_DEDUPE_ENABLED = os.getenv("CLICK_DEDUPE_ENABLED", "1") == "1"
+
+_BOT_UA = re.compile(
+    r"bot|crawl|spider|slurp|scrap|preview|fetch|monitor|headless|phantom|lighthouse|"
+    r"facebookexternalhit|whatsapp|telegram|curl|wget|python-|httpx|okhttp|java/|go-http|libwww",
+    re.IGNORECASE,
+)
+
+
+def is_bot(user_agent: Optional[str]) -> bool:
+    return not user_agent or bool(_BOT_UA.search(user_agent))
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, fp_rate: float):
+        self.m = max(8, int(math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))))
+        self.k = max(1, int(round(self.m / capacity * math.log(2))))
+        self.bits = bytearray((self.m + 7) // 8)
+
+    def _positions(self, key: bytes):
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.m for i in range(self.k)]
+
+    def check_and_add(self, key: bytes) -> bool:
+        """Adds the key and returns True if it was (probably) already present."""
+        present = True
+        for pos in self._positions(key):
+            byte, bit = divmod(pos, 8)
+            if not self.bits[byte] & (1 << bit):
+                present = False
+                self.bits[byte] |= 1 << bit
+        return present
+
+    def contains(self, key: bytes) -> bool:
+        return all(self.bits[pos // 8] & (1 << (pos % 8)) for pos in self._positions(key))
+
+
+class ClickFilter:
+    """Time-windowed duplicate/bot filter in front of the click counter.
+
+    Two Bloom filter generations rotate every `window` seconds, so memory is fixed at
+    2 * m bits. A repeat is always caught within `window` seconds and may be caught for
+    up to 2 * window; a first-time click is wrongly flagged with probability ~fp_rate.
+    """
+
+    def __init__(self, window: float, capacity: int, fp_rate: float, mode: str = "drop", per_link_max: int = 10000):
+        self.window = window
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.mode = mode
+        self.per_link_max = per_link_max
+        self._current = BloomFilter(capacity, fp_rate)
+        self._previous = BloomFilter(capacity, fp_rate)
+        self._rotated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.accepted = 0
+        self.duplicates = 0
+        self.bots = 0
+        self._per_link: "OrderedDict[int, list]" = OrderedDict()  # link_id -> [duplicates, bots], LRU order
+        self.per_link_evicted = 0
+
+    def _rotate(self, now: float) -> None:
+        if now - self._rotated_at >= self.window:
+            self._previous = self._current if now - self._rotated_at < 2 * self.window else BloomFilter(self.capacity, self.fp_rate)
+            self._current = BloomFilter(self.capacity, self.fp_rate)
+            self._rotated_at = now
+
+    def classify(self, link_id: int, fingerprint: int, user_agent: Optional[str]) -> str:
+        """Returns 'ok', 'duplicate' or 'bot'. Only 'ok' clicks should reach the counter."""
+        if is_bot(user_agent):
+            verdict = "bot"
+        else:
+            key = link_id.to_bytes(8, "big", signed=False) + fingerprint.to_bytes(8, "big")
+            with self._lock:
+                self._rotate(time.monotonic())
+                seen = self._previous.contains(key)
+                seen = self._current.check_and_add(key) or seen
+            verdict = "duplicate" if seen else "ok"
+
+        if verdict == "ok":
+            self.accepted += 1
+        elif verdict == "duplicate":
+            self.duplicates += 1
+        else:
+            self.bots += 1
+        if verdict != "ok" and self.mode == "count":
+            self._tally(link_id, 0 if verdict == "duplicate" else 1)
+        return verdict
+
+    def _tally(self, link_id: int, slot: int) -> None:
+        with self._lock:
+            counts = self._per_link.get(link_id)
+            if counts is None:
+                counts = self._per_link[link_id] = [0, 0]
+                if len(self._per_link) > self.per_link_max:
+                    self._per_link.popitem(last=False)
+                    self.per_link_evicted += 1
+            else:
+                self._per_link.move_to_end(link_id)
+            counts[slot] += 1
+
+    def stats(self) -> dict:
+        data = {
+            "window": self.window,
+            "capacity": self.capacity,
+            "fpRate": self.fp_rate,
+            "bitsPerGeneration": self._current.m,
+            "hashes": self._current.k,
+            "accepted": self.accepted,
+            "duplicates": self.duplicates,
+            "bots": self.bots,
+        }
+        if self.mode == "count":
+            with self._lock:
+                per_link = [(link_id, list(counts)) for link_id, counts in self._per_link.items()]
+            data["perLink"] = {link_id: {"duplicates": d, "bots": b} for link_id, (d, b) in per_link}
+            data["perLinkEvicted"] = self.per_link_evicted
+        return data
+
+
+click_filter = ClickFilter(
+    CLICK_DEDUPE_WINDOW, CLICK_DEDUPE_CAPACITY, CLICK_DEDUPE_FP_RATE, CLICK_DEDUPE_MODE, CLICK_DEDUPE_PER_LINK_MAX
+)
@@ -0,0 +1,287 @@
+import os
+import glob
+import fcntl
+import mmap
+import struct
+import zlib
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+from sqlalchemy import func
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Empty -> journal disabled
+CLICK_JOURNAL_DIR = os.getenv("CLICK_JOURNAL_DIR", "")
+CLICK_JOURNAL_SEGMENT_BYTES = int(os.getenv("CLICK_JOURNAL_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+
+# link_id u32 | referrer_id u32 | ts (µs since epoch, UTC) i64 | fingerprint u64  -> 24 bytes, little endian
+RECORD = struct.Struct("<IIqQ")
+NUMPY_DTYPE = [("link_id", "<u4"), ("referrer_id", "<u4"), ("ts_us", "<i8"), ("fingerprint", "<u8")]
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def referrer_id(referrer: Optional[str]) -> int:
+    """CRC32 of the referrer host, 0 when there is none."""
+    if not referrer:
+        return 0
+    host = urlsplit(referrer).hostname or ""
+    return zlib.crc32(host.lower().encode()) if host else 0
+
+
+def _to_us(at: datetime) -> int:
+    return (at - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_us(ts_us: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=ts_us)
+
+
+def _local_day_to_us(day: date) -> int:
+    # rollup days are server-local; journal timestamps are UTC
+    return _to_us(datetime.combine(day, time.min).astimezone(timezone.utc).replace(tzinfo=None))
+
+
+def _lock_path(directory: str) -> str:
+    return os.path.join(directory, "journal.lock")
+
+
+class ClickJournal:
+    """Append-only journal of counted clicks as fixed-width binary records.
+
+    Each worker appends to its own segment file and rotates once `segment_bytes` is reached,
+    so appends need no cross-process locking. Segments are plain arrays of RECORD and can be
+    mapped with mmap / numpy.frombuffer for replay and offline analysis.
+
+    Segments are written unbuffered, so every record is visible to readers as soon as append()
+    returns. While open, the journal holds a shared flock on journal.lock in its directory;
+    rebuild_from_journal() takes it exclusively and so refuses to run next to live workers.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._file = None
+        self._size = 0
+        self._lock_fd = None
+        self._lock = threading.Lock()
+
+    def open(self) -> None:
+        """Registers this process as a journal writer; waits while a rebuild holds the journal."""
+        with self._lock:
+            self._acquire()
+
+    def _acquire(self) -> None:
+        if self._lock_fd is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        fd = os.open(_lock_path(self.directory), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except BlockingIOError:
+            logger.warning(f"Click journal {self.directory} is being rebuilt; waiting for it to finish")
+            fcntl.flock(fd, fcntl.LOCK_SH)
+        self._lock_fd = fd
+
+    def _open_segment(self) -> None:
+        self._acquire()
+        stamp = _to_us(datetime.utcnow())
+        path = os.path.join(self.directory, f"clicks-{stamp:020d}-{os.getpid()}.seg")
+        # unbuffered: a record sitting in a userspace buffer would be missed by a replay
+        self._file = open(path, "ab", buffering=0)
+        self._size = self._file.tell()
+
+    def append(self, link_id: int, fingerprint: int, referrer: Optional[str] = None, at: Optional[datetime] = None) -> None:
+        record = RECORD.pack(link_id, referrer_id(referrer), _to_us(at or datetime.utcnow()), fingerprint)
+        with self._lock:
+            if self._file is None or self._size >= self.segment_bytes:
+                self._close_segment()
+                self._open_segment()
+            self._file.write(record)
+            self._size += RECORD.size
+
+    def _close_segment(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_segment()
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)  # drops the shared flock
+                self._lock_fd = None
+
+
+click_journal = ClickJournal(CLICK_JOURNAL_DIR, CLICK_JOURNAL_SEGMENT_BYTES) if CLICK_JOURNAL_DIR else None
+
+
+# --- reading ---
+
+def segment_paths(directory: str = CLICK_JOURNAL_DIR):
+    return sorted(glob.glob(os.path.join(directory, "clicks-*.seg")))
+
+
+def _mapped(path: str):
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < RECORD.size:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def iter_records(directory: str = CLICK_JOURNAL_DIR) -> Iterator[Tuple[int, int, int, int]]:
+    """Yields (link_id, referrer_id, ts_us, fingerprint) from every segment, oldest first."""
+    for path in segment_paths(directory):
+        mm = _mapped(path)
+        if mm is None:
+            continue
+        with mm:
+            # a torn tail record (crash mid-write) is ignored
+            usable = len(mm) - len(mm) % RECORD.size
+            view = memoryview(mm)[:usable]
+            try:
+                yield from RECORD.iter_unpack(view)
+            finally:
+                view.release()
+
+
+def load_segment(path: str):
+    """Returns the segment as a NumPy structured array (a copy, so the mapping can be closed)."""
+    import numpy as np
+
+    mm = _mapped(path)
+    if mm is None:
+        return np.empty(0, dtype=NUMPY_DTYPE)
+    with mm:
+        count = len(mm) // RECORD.size
+        return np.frombuffer(mm, dtype=NUMPY_DTYPE, count=count).copy()
+
+
+# --- replay ---
+
+@contextmanager
+def exclusive_journal(directory: str = CLICK_JOURNAL_DIR):
+    """Holds journal.lock exclusively; RuntimeError while any worker still has the journal open."""
+    os.makedirs(directory, exist_ok=True)
+    fd = os.open(_lock_path(directory), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise RuntimeError(
+                f"Click workers still have the journal in {directory} open; stop them before rebuilding"
+            )
+        yield
+    finally:
+        os.close(fd)
+
+
+def rebuild_from_journal(db, start: date, end: date) -> dict:
+    """Recomputes hourly/daily rollups for days [start, end) and click_count from the journal.
+
+    Rollup rows in that range are replaced by what the journal holds; click_count is then
+    re-derived from the daily + monthly rollups of every affected link.
+
+    Only days still kept at daily granularity (>= daily_cutoff()) can be rebuilt: older months
+    are already folded into LinkClicksMonthly and would be counted twice, so an earlier
+    `start` raises ValueError.
+
+    Every click worker must be stopped first, not just kept off /track and /r: clicks still
+    in a worker's buffer or shared counters are already journaled and would be added a second
+    time by that worker's next flush. A stopped worker has flushed its buffer (or spooled it).
+    The rebuild holds the journal lock exclusively, so it raises RuntimeError while any worker
+    still has the journal open, and workers starting meanwhile wait until it is done. Leftover
+    spool files would be replayed on top of the rebuilt rows, so they raise RuntimeError too.
+    """
+    from usecases.click_buffer import click_buffer
+    from usecases.click_rollups import daily_cutoff
+
+    if not CLICK_JOURNAL_DIR:
+        raise ValueError("CLICK_JOURNAL_DIR is not set")
+    if start >= end:
+        raise ValueError("start must be before end")
+    cutoff = daily_cutoff()
+    if start < cutoff:
+        raise ValueError(f"Days before {cutoff.isoformat()} are already compacted into monthly rollups")
+
+    with exclusive_journal():
+        if click_buffer.spool_path and click_buffer._spool_files():
+            raise RuntimeError("Unreplayed click spool files exist; start and stop a worker to replay them first")
+        return _rebuild(db, start, end)
+
+
+def _rebuild(db, start: date, end: date) -> dict:
+    from core.models import TrackingLink, LinkClicksHourly, LinkClicksDaily, LinkClicksMonthly
+    from usecases.click_buffer import write_click_deltas
+    from usecases.hll import HyperLogLog
+
+    start_us = _local_day_to_us(start)
+    end_us = _local_day_to_us(end)
+
+    deltas: Dict[Tuple[int, datetime], int] = defaultdict(int)
+    sketches: Dict[Tuple[int, date], HyperLogLog] = {}
+    for link_id, _, ts_us, fingerprint in iter_records():
+        if not start_us <= ts_us < end_us:
+            continue
+        at = _from_us(ts_us).replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+        hour = at.replace(minute=0, second=0, microsecond=0)
+        deltas[(link_id, hour)] += 1
+        sketches.setdefault((link_id, hour.date()), HyperLogLog()).add_hash(fingerprint)
+
+    affected = {link_id for link_id, _ in deltas}
+    affected.update(
+        link_id for (link_id,) in db.query(LinkClicksDaily.link_id)
+        .filter(LinkClicksDaily.date >= start, LinkClicksDaily.date < end).distinct()
+    )
+
+    db.query(LinkClicksHourly).filter(
+        LinkClicksHourly.hour >= datetime.combine(start, time.min),
+        LinkClicksHourly.hour < datetime.combine(end, time.min),
+    ).delete(synchronize_session=False)
+    db.query(LinkClicksDaily).filter(
+        LinkClicksDaily.date >= start, LinkClicksDaily.date < end
+    ).delete(synchronize_session=False)
+
+    if deltas:
+        write_click_deltas(db, deltas, sketches, bump_link_counts=False)
+
+    for link_id in affected:
+        daily = db.query(func.coalesce(func.sum(LinkClicksDaily.clicks), 0)) \
+                  .filter(LinkClicksDaily.link_id == link_id).scalar()
+        monthly = db.query(func.coalesce(func.sum(LinkClicksMonthly.clicks), 0)) \
+                    .filter(LinkClicksMonthly.link_id == link_id).scalar()
+        db.query(TrackingLink).filter(TrackingLink.id == link_id) \
+          .update({TrackingLink.click_count: int(daily) + int(monthly)}, synchronize_session=False)
+
+    db.commit()
+    return {"clicks": sum(deltas.values()), "links": len(affected)}
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(
+        description="Rebuild click rollups from the click journal. Stop every click worker first."
+    )
+    parser.add_argument("start", type=date.fromisoformat, help="first day (YYYY-MM-DD)")
+    parser.add_argument("end", type=date.fromisoformat, help="day after the last day (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        print(rebuild_from_journal(session, args.start, args.end))
+    except (ValueError, RuntimeError) as e:
+        parser.error(str(e))
+    finally:
+        session.close()
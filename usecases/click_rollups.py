@@ -0,0 +1,263 @@
+import os
+import logging
+import threading
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import Select, bindparam, func
+from dotenv import load_dotenv
+
+from database import SessionLocal
+from core.models import LinkClicksHourly, LinkClicksDaily, LinkClicksMonthly
+from usecases.db_utils import upsert_increment
+from usecases.hll import HyperLogLog
+from usecases.shared_counters import shared_counters
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# hourly rows older than this are dropped (LinkClicksDaily already holds the same clicks)
+CLICK_HOURLY_RETENTION_DAYS = int(os.getenv("CLICK_HOURLY_RETENTION_DAYS", "7"))
+# whole months older than this are folded from LinkClicksDaily into LinkClicksMonthly
+CLICK_DAILY_RETENTION_DAYS = int(os.getenv("CLICK_DAILY_RETENTION_DAYS", "180"))
+CLICK_COMPACT_INTERVAL = float(os.getenv("CLICK_COMPACT_INTERVAL", "3600"))  # seconds
+
+RESOLUTIONS = ("hour", "day", "month")
+_DELETE_CHUNK = 1000
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def next_month(d: date) -> date:
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def hourly_cutoff(today: Optional[date] = None) -> datetime:
+    today = today or date.today()
+    return datetime.combine(today - timedelta(days=CLICK_HOURLY_RETENTION_DAYS), time.min)
+
+
+def daily_cutoff(today: Optional[date] = None) -> date:
+    today = today or date.today()
+    return month_start(today - timedelta(days=CLICK_DAILY_RETENTION_DAYS))
+
+
+# --- compaction ---
+
+def _fold_month(db, month: date) -> int:
+    """Moves one month of daily rows into LinkClicksMonthly. Returns the number of daily rows folded."""
+    end = next_month(month)
+    # FOR UPDATE so two workers compacting at once can't fold the same rows twice
+    rows = (
+        db.query(LinkClicksDaily.id, LinkClicksDaily.link_id, LinkClicksDaily.clicks, LinkClicksDaily.unique_sketch)
+        .filter(LinkClicksDaily.date >= month, LinkClicksDaily.date < end)
+        .with_for_update()
+        .all()
+    )
+    if not rows:
+        return 0
+
+    clicks: Dict[int, int] = defaultdict(int)
+    sketches: Dict[int, HyperLogLog] = {}
+    for _, link_id, n, blob in rows:
+        clicks[link_id] += n
+        if blob:
+            sketches.setdefault(link_id, HyperLogLog()).merge(HyperLogLog(blob))
+
+    upsert_increment(
+        db,
+        LinkClicksMonthly.__table__,
+        [{"link_id": link_id, "month": month, "clicks": n, "unique_clicks": 0} for link_id, n in clicks.items()],
+        index_elements=["link_id", "month"],
+        increment=["clicks"],
+    )
+
+    if sketches:
+        monthly = LinkClicksMonthly.__table__
+        stored = (
+            db.query(LinkClicksMonthly.id, LinkClicksMonthly.link_id, LinkClicksMonthly.unique_sketch)
+            .filter(LinkClicksMonthly.month == month, LinkClicksMonthly.link_id.in_(list(sketches)))
+            .with_for_update()
+            .all()
+        )
+        updates = []
+        for row_id, link_id, blob in stored:
+            sketch = sketches[link_id]
+            if blob:
+                sketch.merge(HyperLogLog(blob))
+            updates.append({"b_id": row_id, "b_sketch": sketch.to_bytes(), "b_unique": sketch.count()})
+        if updates:
+            db.execute(
+                monthly.update()
+                .where(monthly.c.id == bindparam("b_id"))
+                .values(unique_sketch=bindparam("b_sketch"), unique_clicks=bindparam("b_unique")),
+                updates,
+            )
+
+    ids = [row_id for row_id, *_ in rows]
+    for i in range(0, len(ids), _DELETE_CHUNK):
+        db.query(LinkClicksDaily).filter(LinkClicksDaily.id.in_(ids[i:i + _DELETE_CHUNK])) \
+          .delete(synchronize_session=False)
+    return len(rows)
+
+
+def compact_rollups(db, today: Optional[date] = None) -> dict:
+    """Drops expired hourly rows and folds whole months past daily retention into monthly rows."""
+    removed_hours = (
+        db.query(LinkClicksHourly)
+        .filter(LinkClicksHourly.hour < hourly_cutoff(today))
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+
+    folded_days = 0
+    cutoff = daily_cutoff(today)
+    oldest = db.query(func.min(LinkClicksDaily.date)).filter(LinkClicksDaily.date < cutoff).scalar()
+    month = month_start(oldest) if oldest else cutoff
+    while month < cutoff:
+        folded_days += _fold_month(db, month)
+        db.commit()
+        month = next_month(month)
+
+    return {"hourlyRowsRemoved": removed_hours, "dailyRowsFolded": folded_days}
+
+
+class RollupCompactor:
+    """Runs compact_rollups every `interval` seconds on a daemon thread."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> None:
+        # with shared counters only the elected flusher worker compacts
+        if shared_counters is not None and not shared_counters.is_leader():
+            return
+        db = SessionLocal()
+        try:
+            result = compact_rollups(db)
+            if any(result.values()):
+                logger.info(f"Click rollup compaction: {result}")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Click rollup compaction failed: {e}")
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.interval):
+            self.run_once()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="click-rollup-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+
+rollup_compactor = RollupCompactor(CLICK_COMPACT_INTERVAL)
+
+
+# --- queries ---
+
+def pick_resolution(start: datetime, end: datetime, requested: Optional[str] = None, today: Optional[date] = None) -> str:
+    """Cheapest resolution for [start, end): the coarsest sensible bucket, never finer than the data kept."""
+    span = end - start
+    if span <= timedelta(days=2):
+        best = "hour"
+    elif span <= timedelta(days=92):
+        best = "day"
+    else:
+        best = "month"
+    if requested in RESOLUTIONS:
+        best = requested
+
+    # older ranges only exist at a coarser tier
+    if start < hourly_cutoff(today) and best == "hour":
+        best = "day"
+    if start.date() < daily_cutoff(today):
+        best = "month"
+    return best
+
+
+def click_series(
+    db,
+    link_ids: Union[Iterable[int], Select],
+    start: datetime,
+    end: datetime,
+    resolution: Optional[str] = None,
+) -> Tuple[str, List[Tuple[datetime, int]]]:
+    """Clicks for the given links in [start, end), bucketed at the cheapest tier that holds the range.
+
+    `link_ids` may also be a one-column select() of link ids, which goes into the IN clause as
+    a subquery instead of a parameter list.
+
+    Returns (resolution, [(bucket_start, clicks), ...]) with empty buckets omitted.
+    """
+    resolution = pick_resolution(start, end, resolution)
+    buckets: Dict[datetime, int] = defaultdict(int)
+    if not isinstance(link_ids, Select):
+        link_ids = list(link_ids)
+        if not link_ids:
+            return resolution, []
+
+    if resolution == "hour":
+        rows = (
+            db.query(LinkClicksHourly.hour, func.sum(LinkClicksHourly.clicks))
+            .filter(
+                LinkClicksHourly.link_id.in_(link_ids),
+                LinkClicksHourly.hour >= start,
+                LinkClicksHourly.hour < end,
+            )
+            .group_by(LinkClicksHourly.hour)
+            .all()
+        )
+        for hour, n in rows:
+            buckets[hour] += int(n or 0)
+    else:
+        first_day = start.date()
+        # end is exclusive; a range ending mid-day still includes that day's row
+        last_day = end.date() if end.time() != time.min else end.date() - timedelta(days=1)
+        rows = (
+            db.query(LinkClicksDaily.date, func.sum(LinkClicksDaily.clicks))
+            .filter(
+                LinkClicksDaily.link_id.in_(link_ids),
+                LinkClicksDaily.date >= first_day,
+                LinkClicksDaily.date <= last_day,
+            )
+            .group_by(LinkClicksDaily.date)
+            .all()
+        )
+        for day, n in rows:
+            bucket = month_start(day) if resolution == "month" else day
+            buckets[datetime.combine(bucket, time.min)] += int(n or 0)
+
+        if resolution == "month":
+            rows = (
+                db.query(LinkClicksMonthly.month, func.sum(LinkClicksMonthly.clicks))
+                .filter(
+                    LinkClicksMonthly.link_id.in_(link_ids),
+                    LinkClicksMonthly.month >= month_start(first_day),
+                    LinkClicksMonthly.month <= last_day,
+                )
+                .group_by(LinkClicksMonthly.month)
+                .all()
+            )
+            for month, n in rows:
+                buckets[datetime.combine(month, time.min)] += int(n or 0)
+
+    return resolution, sorted(buckets.items())
+
+
+def click_total(db, link_ids: Union[Iterable[int], Select], start: datetime, end: datetime) -> int:
+    _, series = click_series(db, link_ids, start, end)
+    return sum(n for _, n in series)
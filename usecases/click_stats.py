@@ -0,0 +1,71 @@
+import os
+from datetime import date
+from typing import Iterable, Optional
+
+from fastapi import Request
+from dotenv import load_dotenv
+
+from core.models import TrackingLink, LinkClicksDaily, LinkClicksMonthly
+from usecases.hll import HyperLogLog, fingerprint_hash
+
+load_dotenv()
+
+# reverse proxies in front of the app that append to X-Forwarded-For; 0 -> the header is ignored
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+
+def client_ip(request: Request) -> Optional[str]:
+    """Caller address used for rate limits and visitor fingerprints.
+
+    The client can put anything at the left of X-Forwarded-For, so only the entries appended
+    by our own proxies are trusted: with N hops the client is the N-th entry from the right.
+    """
+    peer = request.client.host if request.client else None
+    if TRUSTED_PROXY_HOPS <= 0:
+        return peer
+    forwarded = [part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+    if len(forwarded) < TRUSTED_PROXY_HOPS:
+        # the request didn't pass through every configured proxy; fall back to the socket peer
+        return peer
+    return forwarded[-TRUSTED_PROXY_HOPS]
+
+
+def client_fingerprint(request: Request) -> int:
+    """Hashed (IP, user agent) pair used for unique-visitor counting."""
+    return fingerprint_hash(client_ip(request), request.headers.get("user-agent"))
+
+
+def unique_visitors(
+    db,
+    link_ids: Optional[Iterable[int]] = None,
+    campaign_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> int:
+    """Approximate distinct visitors across any set of links and days.
+
+    Merges the stored daily HLL sketches, so weekly/monthly/per-campaign numbers come from
+    the rollup rows alone (one sketch per link-day) instead of raw click events. Days already
+    compacted into LinkClicksMonthly are covered at month granularity.
+    """
+    if link_ids is not None:
+        link_ids = list(link_ids)
+
+    def sketches(model, day_col, first):
+        query = db.query(model.unique_sketch).filter(model.unique_sketch.isnot(None))
+        if link_ids is not None:
+            query = query.filter(model.link_id.in_(link_ids))
+        if campaign_id is not None:
+            query = query.join(TrackingLink, TrackingLink.id == model.link_id) \
+                         .filter(TrackingLink.campaignId == campaign_id)
+        if first:
+            query = query.filter(day_col >= first)
+        if end:
+            query = query.filter(day_col <= end)
+        return (blob for (blob,) in query.yield_per(1000))
+
+    sketch = HyperLogLog.union(sketches(LinkClicksDaily, LinkClicksDaily.date, start))
+    sketch.merge(HyperLogLog.union(
+        sketches(LinkClicksMonthly, LinkClicksMonthly.month, start.replace(day=1) if start else None)
+    ))
+    return sketch.count()
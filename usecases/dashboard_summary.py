@@ -0,0 +1,88 @@
+import os
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import event, func, select
+from dotenv import load_dotenv
+
+from core.models import Campaign, Report, ReportRollup
+from usecases.cache import TTLCache
+
+load_dotenv()
+
+DASHBOARD_CACHE_SIZE = int(os.getenv("DASHBOARD_CACHE_SIZE", "2000"))
+# writes invalidate entries directly; the TTL only bounds how late a campaign's endDate passing shows up
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "300"))  # seconds
+
+# company_id -> (version, summary dict); None is the admin's all-companies view
+summary_cache = TTLCache(DASHBOARD_CACHE_SIZE, DASHBOARD_CACHE_TTL)
+
+
+def compute_summary(db, company_id: Optional[int]) -> dict:
+    """Report totals and the active campaign count in a single statement."""
+    active_campaigns = select(func.count(Campaign.id)).where(Campaign.endDate >= datetime.utcnow())
+    if company_id:
+        active_campaigns = active_campaigns.where(Campaign.company_id == company_id)
+
+    stmt = select(
+        active_campaigns.scalar_subquery(),
+        func.coalesce(func.sum(ReportRollup.totalClicks), 0),
+        func.coalesce(func.sum(ReportRollup.totalSales), 0),
+        func.coalesce(func.sum(ReportRollup.brandCommissionAmount), 0),
+    ).select_from(ReportRollup)
+    if company_id:
+        stmt = stmt.where(ReportRollup.company_id == company_id)
+
+    count_active, total_clicks, total_sales, total_commission = db.execute(stmt).one()
+    return {
+        "activeCampaigns": int(count_active or 0),
+        "totalClicks": int(total_clicks),
+        "totalSales": Decimal(str(total_sales)),
+        "totalCommission": Decimal(str(total_commission)),
+    }
+
+
+def summary_version(db, company_id: Optional[int]) -> tuple:
+    """Cheap watermark of everything the summary depends on, in one round trip.
+
+    Reports are append-only, so their newest id (a seek on ix_reports_company_id) stands in
+    for the raw table; the small campaigns table is counted, and the active campaign count is
+    included because it changes as endDates pass without any write. The newest rollup id
+    (primary key seek) changes when rebuild_report_rollup rewrites the table.
+    """
+    def scoped(stmt, model):
+        return stmt.where(model.company_id == company_id) if company_id else stmt
+
+    parts = [
+        scoped(select(func.max(Report.id)), Report),
+        scoped(select(func.count(Campaign.id)), Campaign),
+        scoped(select(func.max(Campaign.id)), Campaign),
+        scoped(select(func.max(Campaign.last_synced_at)), Campaign),
+        scoped(select(func.count(Campaign.id)).where(Campaign.endDate >= datetime.utcnow()), Campaign),
+        select(func.max(ReportRollup.id)),
+    ]
+    return tuple(db.execute(select(*[part.scalar_subquery() for part in parts])).one())
+
+
+def get_summary(db, company_id: Optional[int], version: Optional[tuple] = None) -> dict:
+    """Cached summary; with a `version`, a cached entry from an older version is recomputed
+    (covers writes made by other worker processes, which can't invalidate this cache)."""
+    cached = summary_cache.get(company_id)
+    if cached is not None and (version is None or cached[0] == version):
+        return cached[1]
+    summary = compute_summary(db, company_id)
+    summary_cache.set(company_id, (version, summary))
+    return summary
+
+
+def invalidate_summary(company_id: Optional[int]) -> None:
+    summary_cache.pop(company_id or None)
+    summary_cache.pop(None)  # the admin view spans every company
+
+
+@event.listens_for(Campaign, "after_insert")
+@event.listens_for(Campaign, "after_update")
+@event.listens_for(Campaign, "after_delete")
+def _invalidate_campaign(mapper, connection, target):
+    invalidate_summary(target.company_id)
@@ -0,0 +1,27 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def dialect_insert(db, table):
+    """Returns an INSERT construct for the session's backend that supports ON CONFLICT."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table)
+    if dialect == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"Upsert is not supported for dialect '{dialect}'")
+
+
+def upsert_increment(db, table, rows, index_elements, increment):
+    """Bulk INSERT ... ON CONFLICT (index_elements) DO UPDATE SET col = col + excluded.col.
+
+    `rows` is a list of dicts with the full insert values; on conflict only the `increment`
+    columns are added to the stored row, so concurrent writers never lose updates.
+    """
+    if not rows:
+        return
+    stmt = dialect_insert(db, table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={col: table.c[col] + stmt.excluded[col] for col in increment},
+    )
+    db.execute(stmt, rows)
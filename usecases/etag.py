@@ -0,0 +1,69 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import func, select
+
+from core.models import ActivityLog, Campaign, Influencer, Report
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag over a data version token (not the body), so it is known before the body is built."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 response if the client's If-None-Match already holds `etag`, else None."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    tags = {tag.strip() for tag in header.split(",")}
+    # weak comparison: W/"x" and "x" name the same version
+    if "*" in tags or etag in tags or etag[2:] in tags:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
+# --- version tokens: cheap aggregates that change whenever the underlying rows do ---
+
+def report_version(db, company_id: Optional[int] = None, influencer_id: Optional[int] = None) -> tuple:
+    """Newest report id in the caller's company / influencer scope, plus the names joined into rows.
+
+    Reports are append-only, so MAX(id) moves on every insert; it is one seek on
+    ix_reports_company_id / ix_reports_influencer_id (or the primary key for the admin's
+    all-companies view) rather than a COUNT over the scope. Rows also carry influencer and
+    campaign names, so an influencer edit (updated_at) or an MLink campaign sync
+    (last_synced_at, the only place campaigns are renamed) changes the version too. Date and
+    influencer filters are part of the query string, which goes into the ETag separately.
+    """
+    newest = select(func.max(Report.id))
+    if influencer_id:
+        newest = newest.where(Report.influencer_id == influencer_id)
+    elif company_id:
+        newest = newest.where(Report.company_id == company_id)
+    stmt = select(
+        newest.scalar_subquery(),
+        select(func.max(Influencer.updated_at)).scalar_subquery(),
+        select(func.max(Campaign.last_synced_at)).scalar_subquery(),
+    )
+    return tuple(db.execute(stmt).one())
+
+
+def campaign_version(query) -> tuple:
+    """(row count, max id, last sync) of a filtered Campaign query; MLink imports bump last_synced_at."""
+    return tuple(
+        query.with_entities(func.count(Campaign.id), func.max(Campaign.id), func.max(Campaign.last_synced_at)).one()
+    )
+
+
+def activity_version(db, company_id: Optional[int] = None) -> tuple:
+    """Newest activity id in a company (None = all companies); the log is append-only.
+
+    A seek on ix_activity_log_company_id (or the primary key), like report_version.
+    """
+    query = db.query(func.max(ActivityLog.id))
+    if company_id:
+        query = query.filter(ActivityLog.company_id == company_id)
+    return (query.scalar(),)
@@ -0,0 +1,45 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, List, Sequence
+
+from fastapi.responses import Response
+
+SHAPES = ("rows", "columns")
+
+
+def _default(value: Any):
+    # mirrors what the Pydantic response models emit: Decimal as string, ISO datetimes
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(default=_default, separators=(",", ":"), ensure_ascii=False)
+
+
+def encode(payload: Any) -> bytes:
+    return _encoder.encode(payload).encode()
+
+
+def shape_rows(columns: Sequence[str], rows: Iterable[Sequence[Any]], shape: str = "rows"):
+    """Core row tuples as a list of objects ('rows') or as {column: [values...]} ('columns').
+
+    The column shape states each key once instead of once per row, which keeps large
+    payloads (and the objects built to encode them) several times smaller.
+    """
+    if shape == "columns":
+        rows = list(rows)
+        return {name: [row[i] for row in rows] for i, name in enumerate(columns)}
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def json_bytes_response(payload: Any, status_code: int = 200, headers: dict = None) -> Response:
+    """Pre-encoded JSON, skipping response_model validation and jsonable_encoder."""
+    return Response(content=encode(payload), status_code=status_code, media_type="application/json", headers=headers)
+
+
+def columns_of(entities: List) -> List[str]:
+    return [entity.key for entity in entities]
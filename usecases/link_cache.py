@@ -0,0 +1,111 @@
+import os
+import hashlib
+from typing import NamedTuple, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from dotenv import load_dotenv
+
+from core.models import TrackingLink
+from usecases.cache import TTLCache
+from usecases.short_code import is_short_code, verify_short_code, is_jwt_shaped
+
+load_dotenv()
+
+LINK_CACHE_SIZE = int(os.getenv("LINK_CACHE_SIZE", "10000"))
+LINK_CACHE_TTL = float(os.getenv("LINK_CACHE_TTL", "300"))  # seconds
+
+
+class LinkInfo(NamedTuple):
+    """The few TrackingLink fields a click/redirect needs."""
+    id: int
+    campaignId: Optional[int]
+    influencer_id: Optional[int]
+    company_id: Optional[int]
+    landing_url: Optional[str]
+    status: Optional[str]
+
+
+link_cache = TTLCache(LINK_CACHE_SIZE, LINK_CACHE_TTL)
+
+
+def token_key(token: str) -> bytes:
+    # tokens are full JWTs; keep the cache keyed on a fixed-size digest instead
+    return hashlib.sha256(token.encode()).digest()
+
+
+def resolve_link(db, token: str) -> Optional[LinkInfo]:
+    # Reject forged/malformed tokens before the cache or DB sees them
+    if is_short_code(token):
+        if not verify_short_code(token):
+            return None
+        lookup = TrackingLink.short_code == token
+    elif is_jwt_shaped(token):
+        lookup = TrackingLink.token == token
+    else:
+        return None
+
+    key = token_key(token)
+    info = link_cache.get(key)
+    if info is not None:
+        return info
+
+    row = (
+        db.query(
+            TrackingLink.id,
+            TrackingLink.campaignId,
+            TrackingLink.influencer_id,
+            TrackingLink.company_id,
+            TrackingLink.landing_url,
+            TrackingLink.status,
+        )
+        .filter(lookup)
+        .first()
+    )
+    if not row:
+        return None
+    info = LinkInfo(*row)
+    link_cache.set(key, info)
+    return info
+
+
+def prime_link(link: TrackingLink) -> None:
+    """Puts a freshly committed link in the cache so its first clicks/redirects skip the DB."""
+    info = LinkInfo(link.id, link.campaignId, link.influencer_id, link.company_id, link.landing_url, link.status)
+    link_cache.set(token_key(link.token), info)
+
+
+def invalidate_token(token: Optional[str]) -> None:
+    if token:
+        link_cache.pop(token_key(token))
+
+
+# invalidations are staged at flush and applied once the transaction commits: dropping the entry
+# at flush time would let a concurrent request re-cache the old, still committed row before commit
+
+@event.listens_for(TrackingLink, "after_insert")
+@event.listens_for(TrackingLink, "after_update")
+@event.listens_for(TrackingLink, "after_delete")
+def _stage_link_invalidation(mapper, connection, target):
+    # covers generate_link as well as any later status / landing_url change
+    session = object_session(target)
+    state = inspect(target)
+    keys = {target.token, target.short_code}
+    keys.update(state.attrs.token.history.deleted or ())
+    keys.update(state.attrs.short_code.history.deleted or ())
+    if session is None:
+        for key in keys:
+            invalidate_token(key)
+        return
+    session.info.setdefault("link_cache_invalidate", set()).update(keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_link_invalidation(session):
+    for key in session.info.pop("link_cache_invalidate", ()):
+        invalidate_token(key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_link_invalidation(session):
+    session.info.pop("link_cache_invalidate", None)
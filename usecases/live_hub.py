@@ -0,0 +1,150 @@
+import os
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Optional, Set
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# updates arriving within one interval are merged into a single delta per company
+LIVE_COALESCE_INTERVAL = float(os.getenv("LIVE_COALESCE_INTERVAL", "1.0"))  # seconds
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "32"))                    # deltas buffered per subscriber
+LIVE_ACTIVITY_PER_DELTA = 20
+
+
+class Subscriber:
+    def __init__(self, company_id: Optional[int], maxsize: int):
+        self.company_id = company_id  # None -> every company (admin)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def offer(self, message: dict) -> None:
+        # a slow client loses its oldest delta instead of blocking the fan-out or growing without bound
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.queue.get_nowait()
+            self.queue.put_nowait(message)
+            self.dropped += 1
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+
+def _empty_delta() -> dict:
+    return {
+        "clicks": defaultdict(int),
+        "reports": {"count": 0, "totalClicks": 0, "totalSales": 0, "brandCommissionAmount": Decimal("0")},
+        "activity": [],
+    }
+
+
+class LiveHub:
+    """In-process pub/sub for dashboard deltas.
+
+    Publishers (request threads, background tasks) only merge into a per-company pending
+    delta under a lock. A single task on the event loop drains it every `interval` seconds
+    and offers one message per company to each subscriber queue, so N open dashboards cost
+    one fan-out per tick rather than N polling query sets. Subscribers only see events
+    published in the same worker process.
+    """
+
+    def __init__(self, interval: float, queue_size: int):
+        self.interval = interval
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._pending: Dict[int, dict] = {}
+        self._subscribers: Dict[Optional[int], Set[Subscriber]] = defaultdict(set)
+        self._task: Optional[asyncio.Task] = None
+
+    # --- publishing (any thread) ---
+
+    def _delta(self, company_id: int) -> dict:
+        delta = self._pending.get(company_id)
+        if delta is None:
+            delta = self._pending[company_id] = _empty_delta()
+        return delta
+
+    def publish_clicks(self, company_id: Optional[int], link_id: int, n: int = 1) -> None:
+        if not self._subscribers or company_id is None:
+            return
+        with self._lock:
+            self._delta(company_id)["clicks"][link_id] += n
+
+    def publish_reports(self, company_id: Optional[int], rows) -> None:
+        """`rows`: Report instances or row dicts that were just committed."""
+        if not self._subscribers or company_id is None:
+            return
+        with self._lock:
+            totals = self._delta(company_id)["reports"]
+            for row in rows:
+                get = row.get if isinstance(row, dict) else lambda name: getattr(row, name)
+                totals["count"] += 1
+                totals["totalClicks"] += get("totalClicks") or 0
+                totals["totalSales"] += get("totalSales") or 0
+                totals["brandCommissionAmount"] += get("brandCommissionAmount") or 0
+
+    def publish_activity(self, company_id: Optional[int], entry: dict) -> None:
+        if not self._subscribers or company_id is None:
+            return
+        with self._lock:
+            activity = self._delta(company_id)["activity"]
+            activity.append(entry)
+            del activity[:-LIVE_ACTIVITY_PER_DELTA]
+
+    # --- subscribing (event loop) ---
+
+    def subscribe(self, company_id: Optional[int]) -> Subscriber:
+        subscriber = Subscriber(company_id, self.queue_size)
+        self._subscribers[company_id].add(subscriber)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        subs = self._subscribers.get(subscriber.company_id)
+        if subs is not None:
+            subs.discard(subscriber)
+            if not subs:
+                del self._subscribers[subscriber.company_id]
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            await asyncio.sleep(self.interval)
+            try:
+                self._fan_out()
+            except Exception as e:
+                logger.error(f"Live dashboard fan-out failed: {e}")
+        self._task = None
+
+    def _fan_out(self) -> None:
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        everyone = self._subscribers.get(None, set())
+        for company_id, delta in batch.items():
+            targets = self._subscribers.get(company_id, set()) | everyone
+            if not targets:
+                continue
+            clicks = dict(delta["clicks"])
+            message = {
+                "companyId": company_id,
+                "clicks": clicks,
+                "clickTotal": sum(clicks.values()),
+                "reports": delta["reports"],
+                "activity": delta["activity"],
+            }
+            for subscriber in targets:
+                subscriber.offer(message)
+
+    def stats(self) -> dict:
+        subs = [s for group in list(self._subscribers.values()) for s in group]
+        return {"subscribers": len(subs), "dropped": sum(s.dropped for s in subs)}
+
+
+live_hub = LiveHub(LIVE_COALESCE_INTERVAL, LIVE_QUEUE_SIZE)
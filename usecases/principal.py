@@ -0,0 +1,96 @@
+import os
+from typing import NamedTuple, Optional
+
+from fastapi import Depends
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from dotenv import load_dotenv
+
+from database import get_db
+from core.models import User, Influencer
+from usecases.auth_use import get_current_user
+from usecases.cache import TTLCache
+
+load_dotenv()
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "5000"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))  # seconds
+
+
+class Principal(NamedTuple):
+    """What handlers need to know about the caller, without loading the User row."""
+    id: int
+    role: str
+    company_id: Optional[int]
+    influencer_id: Optional[int]
+
+
+principal_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
+
+
+def load_principal(db: Session, user_id: int) -> Optional[Principal]:
+    # User + Influencer mapping in a single round trip
+    row = (
+        db.query(User.id, User.role, User.company_id, Influencer.id)
+        .outerjoin(Influencer, Influencer.user_id == User.id)
+        .filter(User.id == user_id)
+        .first()
+    )
+    return Principal(*row) if row else None
+
+
+def get_current_principal(
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Optional[Principal]:
+    """Resolved caller (id, role, company_id, influencer_id), or None if the user no longer exists."""
+    user_id = int(current_user["sub"])
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        principal = load_principal(db, user_id)
+        if principal is not None:
+            principal_cache.set(user_id, principal)
+    return principal
+
+
+def invalidate_principal(user_id: Optional[int]) -> None:
+    if user_id is not None:
+        principal_cache.pop(int(user_id))
+
+
+# evictions are staged at flush and applied once the transaction commits (as in link_cache): evicting
+# at flush time would let a concurrent request re-cache the old, still committed role / mapping
+
+def _stage_invalidation(target, *user_ids) -> None:
+    user_ids = [user_id for user_id in user_ids if user_id is not None]
+    session = object_session(target)
+    if session is None:
+        for user_id in user_ids:
+            invalidate_principal(user_id)
+        return
+    session.info.setdefault("principal_invalidate", set()).update(int(user_id) for user_id in user_ids)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _stage_user(mapper, connection, target):
+    _stage_invalidation(target, target.id)
+
+
+@event.listens_for(Influencer, "after_insert")
+@event.listens_for(Influencer, "after_update")
+@event.listens_for(Influencer, "after_delete")
+def _stage_influencer(mapper, connection, target):
+    # the profile may have been moved away from another user
+    _stage_invalidation(target, target.user_id, *(inspect(target).attrs.user_id.history.deleted or ()))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidation(session):
+    for user_id in session.info.pop("principal_invalidate", ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidation(session):
+    session.info.pop("principal_invalidate", None)
@@ -0,0 +1,111 @@
+import os
+import math
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, NamedTuple
+
+from fastapi import HTTPException
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+# buckets kept per policy; the least recently used key is evicted beyond this
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "50000"))
+
+
+class RatePolicy(NamedTuple):
+    """`burst` requests at once, refilled at burst / period per second."""
+    burst: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.burst / self.period
+
+
+def _policy(name: str, default: str) -> RatePolicy:
+    # env format: "<requests>/<seconds>", e.g. RATE_LIMIT_LOGIN_IP=20/60
+    burst, period = os.getenv(f"RATE_LIMIT_{name.upper()}", default).split("/")
+    return RatePolicy(int(burst), float(period))
+
+
+POLICIES: Dict[str, RatePolicy] = {
+    "login_ip": _policy("login_ip", "20/60"),
+    "login_user": _policy("login_user", "5/60"),
+    "forgot_ip": _policy("forgot_ip", "5/300"),
+    "forgot_email": _policy("forgot_email", "3/900"),
+    "track_ip": _policy("track_ip", "300/60"),
+    "track_token": _policy("track_token", "30/60"),  # per (ip, token)
+}
+
+
+class TokenBucketLimiter:
+    """Token buckets per key in a bounded LRU, so memory stays fixed under key floods.
+
+    An evicted key simply starts again with a full bucket.
+    """
+
+    def __init__(self, policy: RatePolicy, maxsize: int):
+        self.policy = policy
+        self.maxsize = maxsize
+        self.rejected = 0
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()  # key -> [tokens, updated_at]
+        self._lock = threading.Lock()
+
+    def hit(self, key: Hashable, cost: float = 1) -> float:
+        """Takes `cost` tokens. Returns 0 when allowed, otherwise seconds until it would be."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(self.policy.burst), now]
+                self._buckets[key] = bucket
+                while len(self._buckets) > self.maxsize:
+                    self._buckets.popitem(last=False)
+            else:
+                bucket[0] = min(self.policy.burst, bucket[0] + (now - bucket[1]) * self.policy.rate)
+                bucket[1] = now
+                self._buckets.move_to_end(key)
+
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return 0.0
+            self.rejected += 1
+            return (cost - bucket[0]) / self.policy.rate
+
+    def stats(self) -> dict:
+        return {
+            "burst": self.policy.burst,
+            "period": self.policy.period,
+            "keys": len(self._buckets),
+            "maxKeys": self.maxsize,
+            "rejected": self.rejected,
+        }
+
+
+limiters: Dict[str, TokenBucketLimiter] = {
+    name: TokenBucketLimiter(policy, RATE_LIMIT_MAX_KEYS) for name, policy in POLICIES.items()
+}
+
+
+def enforce(*checks) -> None:
+    """Raises 429 if any (policy_name, key) check is over its limit.
+
+    Call at the top of a handler, before touching the DB or hashing anything. Every check
+    consumes a token, so a client spraying usernames still drains its per-IP bucket.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return
+    retry_after = 0.0
+    for name, key in checks:
+        if key is None:
+            continue
+        retry_after = max(retry_after, limiters[name].hit(key))
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
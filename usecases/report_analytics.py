@@ -0,0 +1,111 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Float, cast
+
+from core.models import ReportRollup
+from usecases.report_rollup import SUM_COLUMNS
+
+# public dimension name -> rollup column
+DIMENSIONS = {
+    "company": "company_id",
+    "campaign": "campaignId",
+    "influencer": "influencer_id",
+}
+# time buckets, grouped on a derived 'period' column (start of the bucket)
+TIME_BUCKETS = {"day": None, "week": "W-SUN", "month": "M"}
+METRICS = ("reports", *SUM_COLUMNS)
+
+
+def load_frame(query) -> pd.DataFrame:
+    """One columnar fetch of the filtered ReportRollup query into a DataFrame.
+
+    Amounts are cast to float in SQL so every metric column is a plain float64 array
+    rather than an object column of Decimals.
+    """
+    columns = [
+        ReportRollup.company_id,
+        ReportRollup.campaignId,
+        ReportRollup.influencer_id,
+        ReportRollup.day,
+        ReportRollup.reports,
+        *[cast(getattr(ReportRollup, col), Float) for col in SUM_COLUMNS],
+    ]
+    names = ["company_id", "campaignId", "influencer_id", "day", *METRICS]
+    rows = query.with_entities(*columns).all()
+    frame = pd.DataFrame.from_records(rows, columns=names)
+    frame["day"] = pd.to_datetime(frame["day"])
+    for name in METRICS:
+        frame[name] = pd.to_numeric(frame[name]).astype(np.float64)
+    return frame
+
+
+def _with_period(frame: pd.DataFrame, bucket: str) -> pd.DataFrame:
+    freq = TIME_BUCKETS[bucket]
+    period = frame["day"] if freq is None else frame["day"].dt.to_period(freq).dt.start_time
+    return frame.assign(period=period)
+
+
+def aggregate(
+    frame: pd.DataFrame,
+    dimensions: Sequence[str],
+    metrics: Sequence[str],
+    bucket: Optional[str] = None,
+) -> pd.DataFrame:
+    """Vectorized group-by of `metrics` over `dimensions` (and the time bucket, if any)."""
+    keys: List[str] = [DIMENSIONS[d] for d in dimensions]
+    if bucket:
+        frame = _with_period(frame, bucket)
+        keys.append("period")
+    if not keys:
+        return frame[list(metrics)].sum().to_frame().T
+    return frame.groupby(keys, sort=True)[list(metrics)].sum().reset_index()
+
+
+def pivot(
+    frame: pd.DataFrame,
+    dimensions: Sequence[str],
+    metric: str,
+    columns: str,
+    bucket: Optional[str] = None,
+) -> pd.DataFrame:
+    """`metric` with the `columns` dimension (or 'period') spread across columns, zero-filled."""
+    if bucket:
+        frame = _with_period(frame, bucket)
+    column_key = "period" if columns == "period" else DIMENSIONS[columns]
+    index = [DIMENSIONS[d] for d in dimensions if DIMENSIONS.get(d) != column_key]
+    if bucket and column_key != "period":
+        index.append("period")
+    table = frame.pivot_table(
+        index=index or None, columns=column_key, values=metric, aggfunc="sum", fill_value=0.0
+    )
+    if not index:
+        table.index = ["total"]
+    return table
+
+
+def _jsonable(value):
+    if isinstance(value, pd.Timestamp):
+        return value.date().isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def frame_records(frame: pd.DataFrame) -> List[dict]:
+    return [
+        {key: _jsonable(value) for key, value in row.items()}
+        for row in frame.to_dict("records")
+    ]
+
+
+def pivot_payload(table: pd.DataFrame) -> dict:
+    return {
+        "indexNames": [name for name in table.index.names if name is not None],
+        "index": [
+            [_jsonable(v) for v in (key if isinstance(key, tuple) else (key,))] for key in table.index
+        ],
+        "columns": [_jsonable(c) for c in table.columns],
+        "values": table.to_numpy(dtype=np.float64).round(2).tolist(),
+    }
@@ -0,0 +1,98 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import func, select
+
+from core.models import Report, ReportRollup
+from usecases.db_utils import upsert_increment
+from usecases.dashboard_summary import invalidate_summary, summary_cache
+
+SUM_COLUMNS = (
+    "totalClicks",
+    "totalSales",
+    "brandCommissionAmount",
+    "influencerCommissionAmount",
+    "mimedaCommissionAmount",
+    "agencyCommissionAmount",
+)
+
+RollupKey = Tuple[int, int, int, object]  # (company_id, campaignId, influencer_id, day)
+
+
+def _value(report, name):
+    # accepts Report instances as well as plain row dicts (bulk inserts)
+    return report.get(name) if isinstance(report, dict) else getattr(report, name)
+
+
+def add_reports_to_rollup(db, reports: Iterable) -> None:
+    """Adds reports to ReportRollup inside the caller's transaction.
+
+    Call after the reports are flushed (so createdAt is set) and before the commit, so the
+    rollup and the raw rows are committed or rolled back together. Report sources other than
+    /reports/create (e.g. an MLink report sync) should go through here too.
+    """
+    totals: Dict[RollupKey, dict] = {}
+    for report in reports:
+        created_at = _value(report, "createdAt") or datetime.utcnow()
+        key = (
+            _value(report, "company_id") or 0,
+            _value(report, "campaignId") or 0,
+            _value(report, "influencer_id") or 0,
+            created_at.date(),
+        )
+        row = totals.get(key)
+        if row is None:
+            row = totals[key] = defaultdict(int)
+        row["reports"] += 1
+        for col in SUM_COLUMNS:
+            row[col] += _value(report, col) or 0
+
+    upsert_increment(
+        db,
+        ReportRollup.__table__,
+        [
+            {"company_id": c, "campaignId": camp, "influencer_id": infl, "day": day, **row}
+            for (c, camp, infl, day), row in totals.items()
+        ],
+        index_elements=["company_id", "campaignId", "influencer_id", "day"],
+        increment=["reports", *SUM_COLUMNS],
+    )
+    for company_id in {key[0] for key in totals}:
+        invalidate_summary(company_id)
+
+
+def rebuild_report_rollup(db) -> int:
+    """Regenerates ReportRollup from the reports table in one transaction. Returns the row count."""
+    company = func.coalesce(Report.company_id, 0)
+    campaign = func.coalesce(Report.campaignId, 0)
+    influencer = func.coalesce(Report.influencer_id, 0)
+    day = func.date(Report.createdAt)
+    source = (
+        select(
+            company, campaign, influencer, day, func.count(Report.id),
+            *[func.coalesce(func.sum(getattr(Report, col)), 0) for col in SUM_COLUMNS],
+        )
+        .where(Report.createdAt.isnot(None))
+        .group_by(company, campaign, influencer, day)
+    )
+    table = ReportRollup.__table__
+    db.execute(table.delete())
+    db.execute(
+        table.insert().from_select(
+            ["company_id", "campaignId", "influencer_id", "day", "reports", *SUM_COLUMNS], source
+        )
+    )
+    db.commit()
+    summary_cache.clear()
+    return db.query(func.count(ReportRollup.id)).scalar()
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        print({"rollupRows": rebuild_report_rollup(session)})
+    finally:
+        session.close()
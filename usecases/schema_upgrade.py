@@ -0,0 +1,73 @@
+"""Brings an existing database up to the current models and backfills the report rollup.
+
+    python -m usecases.schema_upgrade [--dry-run]
+
+The app never runs DDL itself, so deployments created before the click rollup tiers, short
+codes and the report rollup need this once (re-running it is harmless):
+
+- creates the new tables (link_clicks_hourly, link_clicks_monthly, report_rollup),
+- adds the new columns (tracking_links.short_code, link_clicks_daily.unique_sketch),
+- creates every index the models declare that the database lacks,
+- fills report_rollup from the reports table if it is empty.
+
+Only additive changes are made. Each statement is printed before it runs.
+"""
+import argparse
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from core.models import Base, ReportRollup
+from database import SessionLocal, engine
+
+
+def _column_ddl(table, column) -> str:
+    # unique=True columns get their uniqueness from the (unique) index created afterwards:
+    # SQLite can't add a UNIQUE column in place
+    col_type = column.type.compile(dialect=engine.dialect)
+    return f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"
+
+
+def pending_ddl() -> list:
+    """DDL statements (as strings) that the database still needs, in execution order."""
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    statements = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            statements.append(str(CreateTable(table).compile(engine)).strip())
+            statements.extend(str(CreateIndex(index).compile(engine)) for index in table.indexes)
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        statements.extend(_column_ddl(table, c) for c in table.columns if c.name not in columns)
+        indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        statements.extend(str(CreateIndex(index).compile(engine)) for index in table.indexes if index.name not in indexes)
+    return statements
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="only print the DDL")
+    args = parser.parse_args()
+
+    statements = pending_ddl()
+    for statement in statements:
+        print(f"{statement};")
+    if args.dry_run:
+        return
+    with engine.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+
+    from usecases.report_rollup import rebuild_report_rollup
+
+    session = SessionLocal()
+    try:
+        if session.query(ReportRollup.id).first() is None:
+            print({"rollupRows": rebuild_report_rollup(session)})
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import os
+import fcntl
+import logging
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Empty -> disabled (each worker only uses its own in-process click buffer)
+CLICK_SHM_NAME = os.getenv("CLICK_SHM_NAME", "")
+CLICK_SHM_SLOTS = int(os.getenv("CLICK_SHM_SLOTS", "65536"))    # link ids 0..SLOTS-1 are counted in shared memory
+CLICK_SHM_WORKERS = int(os.getenv("CLICK_SHM_WORKERS", "32"))   # max worker processes sharing the table
+CLICK_SHM_LOCK_DIR = os.getenv("CLICK_SHM_LOCK_DIR", "/tmp")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedClickCounters:
+    """Click counters shared by all gunicorn workers on one host.
+
+    Layout of the shared block (uint64):
+        owners[WORKERS]            pid that owns each worker row (0 = free)
+        counts[1 + WORKERS, SLOTS] row 0 = totals already flushed to the DB,
+                                   row 1.. = cumulative clicks per worker, indexed by link id
+
+    Every worker only ever writes its own row, so increments need no cross-process lock; a
+    per-process lock covers the threads of one worker, since `+=` on a numpy element is a
+    non-atomic read-modify-write. One worker at a time holds the flusher lock; it sums the worker rows, persists the difference to row 0
+    and writes it to the DB, giving a single flush stream instead of N competing ones.
+    """
+
+    def __init__(self, name: str, slots: int, workers: int, lock_dir: str):
+        self.name = name
+        self.slots = slots
+        self.workers = workers
+        self._claim_path = os.path.join(lock_dir, f"{name}.claim.lock")
+        self._leader_path = os.path.join(lock_dir, f"{name}.leader.lock")
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._leader_fd: Optional[int] = None
+        self.owners = None
+        self.counts = None
+        self.row: Optional[int] = None
+        self._increment_lock = threading.Lock()
+
+    @property
+    def _size(self) -> int:
+        return 8 * (self.workers + (1 + self.workers) * self.slots)
+
+    def attach(self) -> None:
+        if self._shm is not None:
+            return
+        with open(self._claim_path, "a") as claim:
+            fcntl.flock(claim, fcntl.LOCK_EX)
+            try:
+                try:
+                    self._shm = shared_memory.SharedMemory(name=self.name)
+                except FileNotFoundError:
+                    self._shm = shared_memory.SharedMemory(name=self.name, create=True, size=self._size)
+                # the block outlives any single worker; don't let this process' tracker unlink it on exit
+                resource_tracker.unregister(self._shm._name, "shared_memory")
+                if self._shm.size < self._size:
+                    raise RuntimeError(f"Shared memory '{self.name}' is smaller than configured slots/workers")
+
+                buf = self._shm.buf
+                self.owners = np.ndarray((self.workers,), dtype=np.uint64, buffer=buf)
+                self.counts = np.ndarray(
+                    (1 + self.workers, self.slots), dtype=np.uint64, buffer=buf, offset=8 * self.workers
+                )
+
+                # take a free row, or the row of a dead worker (its cumulative counts carry over)
+                pid = os.getpid()
+                for i in range(self.workers):
+                    owner = int(self.owners[i])
+                    if owner == 0 or owner == pid or not _pid_alive(owner):
+                        self.owners[i] = pid
+                        self.row = i + 1
+                        break
+                else:
+                    logger.warning("No free shared click counter row; this worker will buffer clicks locally")
+            finally:
+                fcntl.flock(claim, fcntl.LOCK_UN)
+
+    def detach(self) -> None:
+        if self._shm is None:
+            return
+        if self._leader_fd is not None:
+            os.close(self._leader_fd)
+            self._leader_fd = None
+        if self.row is not None:
+            self.owners[self.row - 1] = 0
+            self.row = None
+        self.owners = self.counts = None
+        self._shm.close()
+        self._shm = None
+
+    def increment(self, link_id: int, n: int = 1) -> bool:
+        """Counts a click in this worker's row. False if the link id doesn't fit (caller buffers it)."""
+        if self.row is None or not 0 <= link_id < self.slots:
+            return False
+        with self._increment_lock:
+            self.counts[self.row, link_id] += n
+        return True
+
+    def is_leader(self) -> bool:
+        if self._shm is None:
+            return False
+        if self._leader_fd is None:
+            fd = os.open(self._leader_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return False
+            self._leader_fd = fd
+        return True
+
+    def collect(self) -> Dict[int, int]:
+        """Clicks counted by all workers since the last mark_flushed(), as {link_id: n}."""
+        totals = self.counts[1:].sum(axis=0, dtype=np.uint64)
+        pending = totals - self.counts[0]
+        idx = np.nonzero(pending)[0]
+        return {int(i): int(pending[i]) for i in idx}
+
+    def mark_flushed(self, deltas: Dict[int, int]) -> None:
+        for link_id, n in deltas.items():
+            self.counts[0, link_id] += n
+
+
+shared_counters = (
+    SharedClickCounters(CLICK_SHM_NAME, CLICK_SHM_SLOTS, CLICK_SHM_WORKERS, CLICK_SHM_LOCK_DIR)
+    if CLICK_SHM_NAME else None
+)
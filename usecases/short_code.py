@@ -0,0 +1,54 @@
+import os
+import hmac
+import hashlib
+import secrets
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 'jwt'   -> generate_link stores a full JWT (legacy, still accepted on /track)
+# 'short' -> generate_link stores an HMAC-signed base62 short code
+LINK_TOKEN_SCHEME = os.getenv("LINK_TOKEN_SCHEME", "jwt")
+_SIGNING_KEY = (os.getenv("LINK_SECRET_KEY") or os.getenv("SECRET_KEY") or "").encode()
+
+ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+_ALPHABET_SET = frozenset(ALPHABET)
+_JWT_CHARS = frozenset(ALPHABET + "-_.")
+
+ID_BYTES, ID_LENGTH = 8, 11      # 64 random bits  -> 11 base62 chars
+SIG_BYTES, SIG_LENGTH = 5, 7     # 40-bit HMAC tag -> 7 base62 chars
+SHORT_CODE_LENGTH = ID_LENGTH + SIG_LENGTH
+
+
+def _b62(data: bytes, width: int) -> str:
+    n = int.from_bytes(data, "big")
+    out = []
+    for _ in range(width):
+        n, r = divmod(n, 62)
+        out.append(ALPHABET[r])
+    return "".join(reversed(out))
+
+
+def _sign(code_id: str) -> str:
+    tag = hmac.new(_SIGNING_KEY, code_id.encode(), hashlib.sha256).digest()[:SIG_BYTES]
+    return _b62(tag, SIG_LENGTH)
+
+
+def new_short_code() -> str:
+    code_id = _b62(secrets.token_bytes(ID_BYTES), ID_LENGTH)
+    return code_id + _sign(code_id)
+
+
+def is_short_code(token: str) -> bool:
+    return len(token) == SHORT_CODE_LENGTH and _ALPHABET_SET.issuperset(token)
+
+
+def verify_short_code(token: str) -> bool:
+    """Checks shape and signature without touching the DB."""
+    if not is_short_code(token):
+        return False
+    return hmac.compare_digest(_sign(token[:ID_LENGTH]), token[ID_LENGTH:])
+
+
+def is_jwt_shaped(token: str) -> bool:
+    return token.count(".") == 2 and _JWT_CHARS.issuperset(token)